@@ -0,0 +1,1805 @@
+"""Context extractor for the Calcula repository.
+
+Walks the repo, indexes Rust / TypeScript / Python definitions, reads the
+frontend/backend log (context_manager/log.log, written by the app's logging
+backend) to find the commands and API calls that were actually exercised, and
+extracts the transitive code context for those roots into a single text file
+(and the clipboard) for use in AI-assisted sessions.
+
+Usage: python context_extractor.py [command|mode] [args]
+Run with --help for the full command list.
+"""
+
+import argparse
+import functools
+import hashlib
+import heapq
+import json
+import mmap
+import os
+import pickle
+import re
+import subprocess
+import sys
+from bisect import insort
+from collections import defaultdict, deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass
+from enum import Enum
+from io import StringIO
+from itertools import islice
+from typing import Dict, FrozenSet, List, Optional, Set, Tuple
+
+# The reference-extraction patterns are plain literal/char-class shapes with
+# no backreferences, so they can run on google-re2's linear-time engine.
+# Opt in with CONTEXT_MANAGER_RE2=1 (same switch as the sibling scripts);
+# falls back silently to the stdlib engine.
+if os.environ.get("CONTEXT_MANAGER_RE2") == "1":
+    try:
+        import re2 as _re
+    except ImportError:
+        _re = re
+else:
+    _re = re
+
+# Path constants stay plain str (os.path, not pathlib) so downstream
+# joins and f-strings never pay a per-use __fspath__/__str__ coercion.
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(SCRIPT_DIR)
+LOG_FILE_PATH = os.path.join(SCRIPT_DIR, "log.log")
+OUTPUT_FILE = os.path.join(SCRIPT_DIR, "extracted_context.txt")
+OUTLINE_FILE = os.path.join(SCRIPT_DIR, "outline.txt")
+STATE_FILE = os.path.join(SCRIPT_DIR, "request_state.json")
+ROOTS_CACHE_FILE = os.path.join(SCRIPT_DIR, "roots_cache.pkl")
+
+# How many call-graph hops to follow from the log roots.
+MAX_DEPTH = 2
+
+# "full" includes complete impl blocks; "summarized" collapses methods that
+# were never observed in a call into one-line signatures.
+OUTPUT_MODE = "summarized"
+
+SOURCE_EXTENSIONS = (".rs", ".ts", ".tsx", ".py")
+
+DEFAULT_IGNORE_DIRS = {
+    ".git",
+    "node_modules",
+    "target",
+    "dist",
+    "build",
+    "__pycache__",
+    ".venv",
+    "e2e",
+    "test-stubs",
+    "public",
+    "context_manager",
+}
+
+IGNORE_FILES = {
+    "log.log",
+    "extracted_context.txt",
+    "outline.txt",
+    "request_state.json",
+}
+
+CONFIG_FILE_NAMES = {"Cargo.toml", "tauri.conf.json"}
+
+# Import prefixes that are noise in an AI context bundle.
+IGNORED_IMPORTS = {
+    ".rs": ["std::", "serde", "log::", "once_cell", "lazy_static"],
+    ".ts": ["react", "react-dom", "@tauri-apps"],
+    ".tsx": ["react", "react-dom", "@tauri-apps"],
+    ".py": ["os", "sys", "re", "json", "typing"],
+}
+
+# One triple-quoted template, formatted a single time when the parser is
+# built; --help then emits it in one write instead of a print per line.
+_HELP_TEMPLATE = """\
+Calcula context extractor
+
+Usage: python context_extractor.py [command|mode] [args]
+
+Commands:
+  (none)               extract context for the log roots
+  full | summarized    set the extraction mode (default: summarized)
+  outline              write a project outline
+  list                 list all indexed definitions
+  search <pattern>     search definitions by substring
+  request <names>      add comma-separated names and extract them
+  request-file <path>  scan a transcript for REQUEST_CODE:/REQUEST_MORE: lines
+  status               show the pending request set
+  reset                clear the pending request set
+
+Config:
+  Project root: {PROJECT_ROOT}
+  Log file:     {LOG_FILE_PATH}
+  Output file:  {OUTPUT_FILE}
+  Outline file: {OUTLINE_FILE}
+  State file:   {STATE_FILE}
+  Max depth:    {MAX_DEPTH}
+"""
+
+
+class DefKind(Enum):
+    FUNCTION = "fn"
+    METHOD = "method"
+    STRUCT = "struct"
+    ENUM = "enum"
+    INTERFACE = "interface"
+    CLASS = "class"
+    TYPE_ALIAS = "type"
+    IMPL_BLOCK = "impl"
+
+
+@dataclass(slots=True)
+class Definition:
+    name: str
+    kind: DefKind
+    filepath: str
+    start_line: int
+    end_line: int
+    content: str
+    type_refs: FrozenSet[str] = frozenset()
+
+
+@dataclass(slots=True)
+class MethodInfo:
+    name: str
+    signature: str
+    content: str
+    start_line: int
+    end_line: int
+
+
+@dataclass(slots=True)
+class FileIndex:
+    filepath: str
+    definitions: List[Definition]
+    imports: List[str]
+
+
+# ---------------------------------------------------------------------------
+# Filesystem walking
+# ---------------------------------------------------------------------------
+
+def get_all_source_files(root_path: str) -> Tuple[List[str], List[str]]:
+    """Return (source_files, config_files) under root_path."""
+    source_files = []
+    config_files = []
+
+    def _walk(root: str) -> None:
+        # os.scandir exposes the cached dirent type, so the extension check
+        # runs on the name alone and no per-entry stat is needed.
+        with os.scandir(root) as it:
+            for entry in it:
+                if entry.is_dir(follow_symlinks=False):
+                    if entry.name not in DEFAULT_IGNORE_DIRS:
+                        _walk(entry.path)
+                elif entry.name in IGNORE_FILES:
+                    continue
+                elif entry.name.endswith(SOURCE_EXTENSIONS):
+                    source_files.append(entry.path)
+                elif entry.name in CONFIG_FILE_NAMES:
+                    config_files.append(entry.path)
+
+    _walk(root_path)
+    return sorted(source_files), sorted(config_files)
+
+
+def get_all_repo_files(root_path: str) -> List[str]:
+    """Return relative paths of every non-ignored file in the repo."""
+    repo_files = []
+    root_len = len(root_path.rstrip(os.sep)) + 1
+
+    def _walk(root: str) -> None:
+        # Same scandir traversal as get_all_source_files: the dirent type
+        # comes back cached, so no per-entry stat syscall.
+        with os.scandir(root) as it:
+            for entry in it:
+                if entry.is_dir(follow_symlinks=False):
+                    if entry.name not in DEFAULT_IGNORE_DIRS:
+                        _walk(entry.path)
+                elif entry.name not in IGNORE_FILES:
+                    repo_files.append(entry.path[root_len:].replace("\\", "/"))
+
+    _walk(root_path)
+    return sorted(repo_files)
+
+
+def relative_path(filepath: str, root: str) -> str:
+    try:
+        return os.path.relpath(filepath, root).replace("\\", "/")
+    except ValueError:
+        return filepath
+
+
+@functools.lru_cache(maxsize=None)
+def _rel(filepath: str) -> str:
+    """relative_path against PROJECT_ROOT, memoized per filepath — many
+    definitions share the same file, so this collapses O(definitions)
+    os.path.relpath calls to O(unique files)."""
+    return relative_path(filepath, PROJECT_ROOT)
+
+
+# ---------------------------------------------------------------------------
+# Low-level scanning helpers
+# ---------------------------------------------------------------------------
+
+# Single-line string literals and line comments, masked out before brace
+# counting.  Newlines are excluded from the string bodies so an unterminated
+# quote can't swallow the rest of the file (matching the old per-line reset).
+_STRING_MASK_RE = re.compile(r'"(?:\\.|[^"\\\n])*"' + r"|'(?:\\.|[^'\\\n])*'")
+_LINE_COMMENT_MASK_RE = re.compile(r"//[^\n]*")
+
+
+def _mask_literals(buf: str) -> str:
+    """Blank out string literals and line comments, preserving offsets."""
+    buf = _STRING_MASK_RE.sub(lambda m: " " * len(m.group()), buf)
+    return _LINE_COMMENT_MASK_RE.sub(lambda m: " " * len(m.group()), buf)
+
+
+def find_matching_brace(lines: List[str], start_line: int,
+                        open_char: str = "{", close_char: str = "}") -> int:
+    """Return the line index of the brace closing the block opened at/after
+    start_line. Falls back to the last line when unbalanced.
+
+    Works on a literal-masked join of the remaining lines so the brace
+    search is a pair of C-level str.find calls per token instead of a
+    Python loop over every character.
+    """
+    buf = _mask_literals("\n".join(lines[start_line:]))
+    balance = 0
+    found_open = False
+    pos = 0
+    find = buf.find
+    while True:
+        oi = find(open_char, pos)
+        ci = find(close_char, pos)
+        if ci == -1:
+            break
+        if oi != -1 and oi < ci:
+            balance += 1
+            found_open = True
+            pos = oi + 1
+        else:
+            balance -= 1
+            pos = ci + 1
+            if found_open and balance == 0:
+                return start_line + buf.count("\n", 0, ci)
+    return len(lines) - 1
+
+
+# Sentinel in the per-file indent array for blank lines (they neither open
+# nor close an indentation block).
+_BLANK_INDENT = 255
+
+
+def build_indent_array(lines: List[str], stripped: List[str]) -> bytearray:
+    """Per-line indentation widths, computed once per file."""
+    return bytearray(
+        min(len(ln) - len(ln.lstrip()), _BLANK_INDENT - 1) if s else _BLANK_INDENT
+        for ln, s in zip(lines, stripped))
+
+
+def find_python_block_end(indent: bytearray, start_line: int) -> int:
+    """Return the last line of the indentation block starting at start_line."""
+    def_indent = indent[start_line]
+    end = start_line
+    for i in range(start_line + 1, len(indent)):
+        ind = indent[i]
+        if ind == _BLANK_INDENT:
+            continue
+        if ind <= def_indent:
+            break
+        end = i
+    return end
+
+
+def find_definition_start(stripped: List[str], def_line: int) -> int:
+    """Walk backwards over attributes / doc comments / decorators so they are
+    included with the definition."""
+    start = def_line
+    j = def_line - 1
+    while j >= 0 and def_line - j <= 15:
+        s = stripped[j]
+        if (s.startswith("#[") or s.startswith("///")
+                or s.startswith("//!") or s.startswith("@")):
+            start = j
+            j -= 1
+        elif s == "" or s.startswith("//"):
+            break
+        else:
+            break
+    return start
+
+
+# Characters that matter when walking a signature: angle brackets for
+# generic depth, and the brace/semicolon terminators.
+_SIG_DELIM_RE = re.compile(r"[<>{;]")
+
+# Terminators alone, for windows with no "<": without an opening angle
+# bracket there is no generic depth, and a bare ">" (the "->" arrow) is
+# ignored at depth 0, so only "{" or ";" can end the signature.
+_SIG_TERM_RE = re.compile(r"[{;]")
+
+
+def extract_method_signature(lines: List[str], start_idx: int) -> str:
+    """Collect the signature of the definition at start_idx, stopping at the
+    opening brace or semicolon (outside strings and generic parameter
+    lists).
+
+    Scans a literal-masked join of the signature window with a delimiter
+    regex instead of stepping per character.  The common case — no string
+    literals, comments or generics anywhere in the window — skips the
+    masking and depth tracking and partitions on the first delimiter
+    directly.
+    """
+    window = "\n".join(lines[start_idx:start_idx + 10])
+    if ('"' not in window and "'" not in window and "<" not in window
+            and "//" not in window):
+        m = _SIG_TERM_RE.search(window)
+        if m is not None:
+            end = m.start() if m.group() == "{" else m.end()
+            return clean_signature(window[:end].replace("\n", " "))
+        return clean_signature(window.replace("\n", " "))
+    buf = _mask_literals(window)
+    angle_depth = 0
+    for m in _SIG_DELIM_RE.finditer(buf):
+        ch = m.group()
+        if ch == "<":
+            angle_depth += 1
+        elif ch == ">":
+            if angle_depth > 0:
+                angle_depth -= 1
+        elif angle_depth == 0:
+            # "{" stops before the brace, ";" is kept with the signature.
+            end = m.start() if ch == "{" else m.end()
+            return clean_signature(window[:end].replace("\n", " "))
+    return clean_signature(window.replace("\n", " "))
+
+
+@functools.lru_cache(maxsize=8192)
+def clean_signature(sig: str) -> str:
+    sig = sig.partition("{")[0]
+    sig = sig.partition(" where ")[0]
+    return " ".join(sig.split()).strip()
+
+
+_IMPL_PREFIX_RE = re.compile(r"^impl\s*(?:<[^>]*>)?\s*")
+_GENERIC_TAIL_RE = re.compile(r"<.*")
+
+
+def extract_impl_type_name(header: str) -> Tuple[Optional[str], str]:
+    """Parse an `impl` header into (trait_name_or_None, type_name)."""
+    header = header.partition("{")[0].strip()
+    body = _IMPL_PREFIX_RE.sub("", header)
+    if " for " in body:
+        trait_part, type_part = body.split(" for ", 1)
+        trait_name = _GENERIC_TAIL_RE.sub("", trait_part).strip().split("::")[-1]
+        type_name = _GENERIC_TAIL_RE.sub("", type_part).strip().split("::")[-1]
+        return trait_name, type_name
+    type_name = _GENERIC_TAIL_RE.sub("", body).strip().split("::")[-1]
+    return None, type_name
+
+
+# ---------------------------------------------------------------------------
+# Reference extraction
+# ---------------------------------------------------------------------------
+
+_TYPE_NOISE = frozenset({
+    "Ok", "Err", "Some", "None", "Self", "String", "Str", "Vec", "Box",
+    "Option", "Result", "HashMap", "HashSet", "BTreeMap", "Arc", "Rc",
+    "Mutex", "RefCell", "Cow", "Default", "Debug", "Clone", "Copy",
+    "Send", "Sync", "From", "Into", "True", "False", "Promise", "Array",
+    "Record", "Partial", "Readonly", "Pick", "Omit", "Map", "Set",
+    "Date", "Error", "Math", "JSON", "Object", "Number", "Boolean",
+})
+
+
+_PASCAL_RE = _re.compile(r"\b[A-Z][a-zA-Z0-9]*\b")
+
+_UPPERS = frozenset("ABCDEFGHIJKLMNOPQRSTUVWXYZ")
+_NO_TYPES: FrozenSet[str] = frozenset()
+
+
+def iter_type_references(content: str, ext: str):
+    """Yield PascalCase identifiers referenced in content, noise-filtered.
+
+    Generator form of extract_type_references for callers that only
+    iterate: feeds matches straight to the consumer without building an
+    intermediate set.
+    """
+    intern = sys.intern
+    for m in _PASCAL_RE.findall(content):
+        if len(m) > 1 and m not in _TYPE_NOISE:
+            # The same type names recur across thousands of bodies; interning
+            # collapses the duplicates to one object each and makes the
+            # set-membership checks downstream pointer comparisons.
+            yield intern(m)
+
+
+@functools.lru_cache(maxsize=4096)
+def _type_references_cached(content: str, ext: str) -> FrozenSet[str]:
+    return frozenset(iter_type_references(content, ext))
+
+
+def extract_type_references(content: str, ext: str) -> FrozenSet[str]:
+    """PascalCase identifiers referenced by a definition body.
+
+    Identical fragments (shared headers, duplicated signatures, method
+    bodies repeated across generic impls) recur a lot across an index
+    pass, so results are memoized; bodies of 4 KiB or more bypass the
+    cache — at that size duplication is rare and caching them would just
+    pin big strings.
+    """
+    # No uppercase letter anywhere means no PascalCase worth scanning for
+    # (snake_case-only bodies are common); the C-level disjointness check
+    # is far cheaper than the regex pass it skips.
+    if _UPPERS.isdisjoint(content):
+        return _NO_TYPES
+    if len(content) >= 4096:
+        return _type_references_cached.__wrapped__(content, ext)
+    return _type_references_cached(content, ext)
+
+
+_FUNC_CALL_RE = _re.compile(r"\b([a-z_][a-zA-Z0-9_]*)\s*\(")
+_STATIC_CALL_RE = _re.compile(r"\b([A-Z][a-zA-Z0-9_]*)\s*::\s*([a-z_][a-zA-Z0-9_]*)\s*\(")
+_INSTANCE_CALL_RE = _re.compile(r"\.([a-z_][a-zA-Z0-9_]*)\s*\(")
+
+# All three call shapes in one alternation so dependency resolution streams
+# each body through the regex engine once.  Dispatch is on lastgroup: "sm"
+# for Type::method(, "im" for .method(, "fn" for a bare call.
+_CALLSITE_RE = _re.compile(
+    r"\b(?P<st>[A-Z][a-zA-Z0-9_]*)\s*::\s*(?P<sm>[a-z_][a-zA-Z0-9_]*)\s*\("
+    r"|\.(?P<im>[a-z_][a-zA-Z0-9_]*)\s*\("
+    r"|\b(?P<fn>[a-z_][a-zA-Z0-9_]*)\s*\("
+)
+
+
+def extract_function_calls(content: str, all_func_names: Set[str]) -> Set[str]:
+    """Free-function call sites in content that resolve to indexed names."""
+    calls = set()
+    intern = sys.intern
+    for m in _FUNC_CALL_RE.findall(content):
+        if m in all_func_names:
+            calls.add(intern(m))
+    return calls
+
+
+# Shapes that bind a local variable name to a PascalCase type: typed lets,
+# constructor calls, struct literals, and typed parameters.
+_VAR_TYPE_RES = tuple(_re.compile(p) for p in [
+    r"let\s+(?:mut\s+)?([a-z_]\w*)\s*:\s*&?(?:mut\s+)?([A-Z]\w*)",
+    r"let\s+(?:mut\s+)?([a-z_]\w*)\s*=\s*([A-Z]\w*)::",
+    r"let\s+(?:mut\s+)?([a-z_]\w*)\s*=\s*([A-Z]\w*)\s*\{",
+    r"\b([a-z_]\w*)\s*:\s*&?(?:mut\s+)?([A-Z]\w*)\s*[,)]",
+])
+
+
+def infer_instance_method_calls(content: str) -> Dict[str, Set[str]]:
+    """Map types to methods called on local variables of that type.
+
+    Variable types are inferred from let-bindings, constructor calls, struct
+    literals, and typed parameters.
+    """
+    var_to_type: Dict[str, str] = {}
+    for pattern in _VAR_TYPE_RES:
+        for var_name, type_name in pattern.findall(content):
+            if var_name not in var_to_type:
+                var_to_type[var_name] = sys.intern(type_name)
+
+    if not var_to_type:
+        return {}
+    type_to_methods: Dict[str, Set[str]] = defaultdict(set)
+    # One combined alternation (longest variable first so prefixes don't
+    # shadow) turns the V separate content scans into a single pass.
+    alt = "|".join(sorted(map(re.escape, var_to_type), key=len, reverse=True))
+    var_method_re = _re.compile(rf"\b({alt})\.([a-z_]\w*)\s*\(")
+    for m in var_method_re.finditer(content):
+        type_to_methods[var_to_type[m.group(1)]].add(sys.intern(m.group(2)))
+    return dict(type_to_methods)
+
+
+# ---------------------------------------------------------------------------
+# Per-language parsers
+# ---------------------------------------------------------------------------
+
+# Definition-shape patterns per language.  The (?P<NAME>...) placeholder in
+# each alternative is renamed by _fuse_def_patterns so the fused regex can
+# recover both the kind (via lastgroup) and the identifier from one match.
+_RUST_DEF_SPECS = [
+    (DefKind.FUNCTION, r"\s*(?:pub(?:\([^)]*\))?\s+)?(?:async\s+)?(?:unsafe\s+)?fn\s+(?P<NAME>[A-Za-z_]\w*)"),
+    (DefKind.STRUCT, r"\s*(?:pub(?:\([^)]*\))?\s+)?struct\s+(?P<NAME>[A-Za-z_]\w*)"),
+    (DefKind.ENUM, r"\s*(?:pub(?:\([^)]*\))?\s+)?enum\s+(?P<NAME>[A-Za-z_]\w*)"),
+    (DefKind.INTERFACE, r"\s*(?:pub(?:\([^)]*\))?\s+)?(?:unsafe\s+)?trait\s+(?P<NAME>[A-Za-z_]\w*)"),
+    (DefKind.TYPE_ALIAS, r"\s*(?:pub(?:\([^)]*\))?\s+)?type\s+(?P<NAME>[A-Za-z_]\w*)"),
+    (DefKind.IMPL_BLOCK, r"\s*(?P<NAME>impl)\b"),
+]
+
+_TS_DEF_SPECS = [
+    (DefKind.FUNCTION, r"\s*(?:export\s+)?(?:default\s+)?(?:async\s+)?function\s+(?P<NAME>[A-Za-z_]\w*)"),
+    (DefKind.FUNCTION, r"\s*(?:export\s+)?const\s+(?P<NAME>[A-Za-z_]\w*)\s*=\s*(?:async\s+)?\("),
+    (DefKind.CLASS, r"\s*(?:export\s+)?(?:default\s+)?(?:abstract\s+)?class\s+(?P<NAME>[A-Za-z_]\w*)"),
+    (DefKind.INTERFACE, r"\s*(?:export\s+)?interface\s+(?P<NAME>[A-Za-z_]\w*)"),
+    (DefKind.ENUM, r"\s*(?:export\s+)?(?:const\s+)?enum\s+(?P<NAME>[A-Za-z_]\w*)"),
+    (DefKind.TYPE_ALIAS, r"\s*(?:export\s+)?type\s+(?P<NAME>[A-Za-z_]\w*)\s*="),
+]
+
+_PY_DEF_SPECS = [
+    (DefKind.FUNCTION, r"\s*(?:async\s+)?def\s+(?P<NAME>[A-Za-z_]\w*)"),
+    (DefKind.CLASS, r"\s*class\s+(?P<NAME>[A-Za-z_]\w*)"),
+]
+
+
+def _fuse_def_patterns(specs):
+    """Join a spec list into one regex plus a lastgroup -> DefKind map."""
+    parts = []
+    kind_by_group = {}
+    for i, (kind, pat) in enumerate(specs):
+        group = "d%d" % i
+        parts.append("(?:%s)" % pat.replace("(?P<NAME>", "(?P<%s>" % group))
+        kind_by_group[group] = kind
+    return re.compile("|".join(parts)), kind_by_group
+
+
+_RUST_DEF_RE, _RUST_KIND_BY_GROUP = _fuse_def_patterns(_RUST_DEF_SPECS)
+_TS_DEF_RE, _TS_KIND_BY_GROUP = _fuse_def_patterns(_TS_DEF_SPECS)
+_PY_DEF_RE, _PY_KIND_BY_GROUP = _fuse_def_patterns(_PY_DEF_SPECS)
+
+
+def parse_rust_file(filepath: str, lines: List[str],
+                    stripped: List[str]) -> Tuple[List[Definition], List[str]]:
+    definitions = []
+    imports = []
+    i = 0
+    while i < len(lines):
+        line = lines[i]
+        s = stripped[i]
+        # One char test covers blanks, comments (//, ///, /*) and
+        # attributes (#[, #!): none can open a definition.
+        if not s or s[0] in "#/":
+            i += 1
+            continue
+        if s.startswith("use "):
+            imports.append(s)
+            i += 1
+            continue
+        # Every definition keyword (pub/fn/struct/enum/trait/type/impl/
+        # unsafe/async) starts with one of these, so other lines skip the
+        # fused regex entirely.
+        if s[0] not in "pfsetiua":
+            i += 1
+            continue
+        m = _RUST_DEF_RE.match(line)
+        if not m:
+            i += 1
+            continue
+        kind = _RUST_KIND_BY_GROUP[m.lastgroup]
+        start = find_definition_start(stripped, i)
+        if kind == DefKind.IMPL_BLOCK:
+            end = find_matching_brace(lines, i)
+            header = "\n".join(lines[i:min(i + 5, len(lines))])
+            trait_name, type_name = extract_impl_type_name(header)
+            if trait_name:
+                name = f"{trait_name}_for_{type_name}"
+            else:
+                name = f"impl_{type_name}"
+        elif kind == DefKind.TYPE_ALIAS:
+            name = m.group(m.lastgroup)
+            end = i
+        elif kind in (DefKind.STRUCT, DefKind.ENUM):
+            name = m.group(m.lastgroup)
+            if s.endswith(";"):
+                end = i
+            else:
+                end = find_matching_brace(lines, i)
+        else:
+            name = m.group(m.lastgroup)
+            if s.endswith(";"):
+                end = i
+            else:
+                end = find_matching_brace(lines, i)
+        content = "\n".join(lines[start:end + 1])
+        definitions.append(Definition(
+            name=name,
+            kind=kind,
+            filepath=filepath,
+            start_line=start,
+            end_line=end,
+            content=content,
+            type_refs=extract_type_references(content, ".rs"),
+        ))
+        i = end + 1
+    return definitions, imports
+
+
+def parse_typescript_file(filepath: str, lines: List[str],
+                          stripped: List[str]) -> Tuple[List[Definition], List[str]]:
+    definitions = []
+    imports = []
+    i = 0
+    while i < len(lines):
+        line = lines[i]
+        s = stripped[i]
+        if not s or s.startswith("//") or s.startswith("*"):
+            i += 1
+            continue
+        if s.startswith("import "):
+            imports.append(s)
+            i += 1
+            continue
+        m = _TS_DEF_RE.match(line)
+        if not m:
+            i += 1
+            continue
+        kind = _TS_KIND_BY_GROUP[m.lastgroup]
+        name = m.group(m.lastgroup)
+        start = find_definition_start(stripped, i)
+        if kind == DefKind.TYPE_ALIAS:
+            end = i
+            k = i
+            while k < min(i + 20, len(lines)) and not lines[k].rstrip().endswith(";"):
+                k += 1
+            if k < len(lines):
+                end = k
+        elif "{" in line:
+            end = find_matching_brace(lines, i)
+        else:
+            end = i
+        content = "\n".join(lines[start:end + 1])
+        ext = os.path.splitext(filepath)[1]
+        definitions.append(Definition(
+            name=name,
+            kind=kind,
+            filepath=filepath,
+            start_line=start,
+            end_line=end,
+            content=content,
+            type_refs=extract_type_references(content, ext),
+        ))
+        i = end + 1
+    return definitions, imports
+
+
+def parse_python_file(filepath: str, lines: List[str],
+                      stripped: List[str]) -> Tuple[List[Definition], List[str]]:
+    definitions = []
+    imports = []
+    indent = build_indent_array(lines, stripped)
+    i = 0
+    while i < len(lines):
+        line = lines[i]
+        s = stripped[i]
+        if not s or s.startswith("#"):
+            i += 1
+            continue
+        if s.startswith("import ") or s.startswith("from "):
+            imports.append(s)
+            i += 1
+            continue
+        m = _PY_DEF_RE.match(line)
+        if not m:
+            i += 1
+            continue
+        kind = _PY_KIND_BY_GROUP[m.lastgroup]
+        # Only index top-level defs; nested ones travel with their parent.
+        if line[0] in " \t":
+            i += 1
+            continue
+        name = m.group(m.lastgroup)
+        start = find_definition_start(stripped, i)
+        end = find_python_block_end(indent, i)
+        content = "\n".join(lines[start:end + 1])
+        definitions.append(Definition(
+            name=name,
+            kind=kind,
+            filepath=filepath,
+            start_line=start,
+            end_line=end,
+            content=content,
+            type_refs=extract_type_references(content, ".py"),
+        ))
+        i = end + 1
+    return definitions, imports
+
+
+# Files at or above this size are mmapped and decoded in one shot; the
+# text layer would funnel them through its incremental decoder in 8 KiB
+# chunks.  Same threshold ts_analyzer uses for its read path.
+_MMAP_THRESHOLD = 64 * 1024
+
+
+def parse_file(filepath: str) -> FileIndex:
+    try:
+        if os.path.getsize(filepath) >= _MMAP_THRESHOLD:
+            with open(filepath, "rb") as f, \
+                    mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                lines = mm[:].decode("utf-8", "replace").splitlines()
+        else:
+            with open(filepath, "r", encoding="utf-8", errors="replace") as f:
+                lines = f.read().splitlines()
+    except OSError:
+        return FileIndex(filepath=filepath, definitions=[], imports=[])
+    _, ext = os.path.splitext(filepath)
+    stripped = [ln.strip() for ln in lines]
+    if ext == ".rs":
+        definitions, imports = parse_rust_file(filepath, lines, stripped)
+    elif ext in (".ts", ".tsx"):
+        definitions, imports = parse_typescript_file(filepath, lines, stripped)
+    elif ext == ".py":
+        definitions, imports = parse_python_file(filepath, lines, stripped)
+    else:
+        definitions, imports = [], []
+    return FileIndex(filepath=filepath, definitions=definitions, imports=imports)
+
+
+# Below this many files the pool's startup cost outweighs the parallelism.
+# Workers read their own files, so cold-cache I/O latency overlaps across
+# the pool along with the parse work itself.
+_PARALLEL_THRESHOLD = 8
+
+# Disambiguation suffix appended to colliding impl names (impl_Foo_2 etc.).
+_IMPL_SUFFIX_RE = _re.compile(r"_\d+$")
+
+# Definitions per BFS level before the content scans fan out over threads.
+_SCAN_PARALLEL_THRESHOLD = 16
+
+_QUALIFIED_CACHE: Dict[Tuple[str, str], str] = {}
+
+
+def _qualify(type_name: str, method_name: str) -> str:
+    """`Type::method`, built once per pair — the resolution loops rebuild
+    the same qualified names thousands of times for hot types."""
+    key = (type_name, method_name)
+    qualified = _QUALIFIED_CACHE.get(key)
+    if qualified is None:
+        qualified = _QUALIFIED_CACHE[key] = f"{type_name}::{method_name}"
+    return qualified
+
+
+# Kinds that define (or implement) a type, checked per type reference
+# during resolution.
+_TYPE_DEFINING_KINDS = frozenset({
+    DefKind.STRUCT, DefKind.ENUM, DefKind.INTERFACE,
+    DefKind.TYPE_ALIAS, DefKind.CLASS, DefKind.IMPL_BLOCK,
+})
+
+
+# Parsed FileIndex objects persisted between runs, keyed per file on
+# (st_mtime_ns, st_size) so unchanged files skip parsing entirely.  Bump
+# the schema version whenever the parsed shapes change.
+PARSE_CACHE_FILE = os.path.join(SCRIPT_DIR, ".context_extractor_cache.pkl")
+_PARSE_CACHE_SCHEMA = 1
+
+
+def _load_parse_cache() -> Dict[str, Tuple[Tuple[int, int], FileIndex]]:
+    try:
+        with open(PARSE_CACHE_FILE, "rb") as f:
+            payload = pickle.load(f)
+        if payload.get("schema") == _PARSE_CACHE_SCHEMA:
+            return payload["entries"]
+    except (OSError, pickle.PickleError, EOFError, AttributeError, KeyError):
+        pass
+    return {}
+
+
+def _save_parse_cache(entries: Dict[str, Tuple[Tuple[int, int], FileIndex]]) -> None:
+    tmp_path = PARSE_CACHE_FILE + ".tmp"
+    try:
+        with open(tmp_path, "wb") as f:
+            pickle.dump({"schema": _PARSE_CACHE_SCHEMA, "entries": entries}, f)
+        os.replace(tmp_path, PARSE_CACHE_FILE)
+    except OSError:
+        pass
+
+
+def parse_files(filepaths: List[str]) -> Dict[str, FileIndex]:
+    """Parse a batch of source files, reusing cached results where fresh.
+
+    Files whose (mtime, size) match the on-disk cache skip parsing; the
+    rest fan out across a process pool (one worker per core) when there
+    are enough of them, since each file parses independently — small
+    batches stay serial to avoid the pool startup cost.  Merging the
+    returned indices into the shared lookup tables is left to the caller
+    and stays on the main process.
+    """
+    cache = _load_parse_cache()
+    keys: Dict[str, Optional[Tuple[int, int]]] = {}
+    indices: Dict[str, FileIndex] = {}
+    stale: List[str] = []
+    for filepath in filepaths:
+        try:
+            st = os.stat(filepath)
+            key = (st.st_mtime_ns, st.st_size)
+        except OSError:
+            key = None
+        keys[filepath] = key
+        entry = cache.get(filepath)
+        if key is not None and entry is not None and entry[0] == key:
+            indices[filepath] = entry[1]
+        else:
+            stale.append(filepath)
+
+    if len(stale) >= _PARALLEL_THRESHOLD:
+        with ProcessPoolExecutor() as executor:
+            indices.update(zip(stale, executor.map(parse_file, stale, chunksize=16)))
+    else:
+        for filepath in stale:
+            indices[filepath] = parse_file(filepath)
+
+    # Persist before the caller mutates anything (impl renames happen
+    # during index building); dropped files fall out of the cache here.
+    _save_parse_cache({fp: (keys[fp], indices[fp])
+                       for fp in filepaths if keys[fp] is not None})
+    return {fp: indices[fp] for fp in filepaths}
+
+
+# ---------------------------------------------------------------------------
+# Impl-block helpers
+# ---------------------------------------------------------------------------
+
+_METHOD_DEF_RE = _re.compile(r"^(\s*)(pub\s+)?(async\s+)?fn\s+([a-zA-Z_][a-zA-Z0-9_]*)")
+
+
+@functools.lru_cache(maxsize=2048)
+def _extract_methods_impl_cached(impl_content: str) -> Tuple[MethodInfo, ...]:
+    methods = []
+    lines = impl_content.split("\n")
+    # Strip once up front; the look-back loop revisits the same lines for
+    # consecutive methods, so stripping per visit re-allocates.
+    stripped = [ln.strip() for ln in lines]
+    i = 1  # skip the impl header line
+    while i < len(lines):
+        m = _METHOD_DEF_RE.match(lines[i])
+        if not m:
+            i += 1
+            continue
+        name = m.group(4)
+        start = i
+        j = i - 1
+        while j >= 0 and i - j <= 15:
+            s = stripped[j]
+            if s.startswith("#[") or s.startswith("///") or s.startswith("//"):
+                start = j
+                j -= 1
+            else:
+                break
+        signature = extract_method_signature(lines, i)
+        end = find_matching_brace(lines, i)
+        content = "\n".join(lines[start:end + 1])
+        methods.append(MethodInfo(
+            name=name,
+            signature=signature,
+            content=content,
+            start_line=start,
+            end_line=end,
+        ))
+        i = end + 1
+    return tuple(methods)
+
+
+def extract_methods_from_impl(impl_content: str) -> List[MethodInfo]:
+    """Split an impl block's content into its methods (with leading
+    attributes/doc comments attached).
+
+    Indexing and summarization both parse the same impl bodies, so results
+    are memoized on the content string; the cached tuple is shared and the
+    returned list is a fresh wrapper.
+    """
+    return list(_extract_methods_impl_cached(impl_content))
+
+
+def create_summarized_impl(impl_def: Definition, called_methods: FrozenSet[str]) -> str:
+    """Render an impl block keeping full bodies only for called methods;
+    everything else collapses to a signature line."""
+    lines = impl_def.content.split("\n")
+    header = lines[0]
+    head, brace, _ = header.partition("{")
+    header = head + "{" if brace else header + " {"
+    _, type_name = extract_impl_type_name(impl_def.content.split("\n", 1)[0])
+
+    buf = StringIO()
+    buf.write(header)
+    buf.write("\n")
+    methods = extract_methods_from_impl(impl_def.content)
+    for method in methods:
+        qualified = _qualify(type_name, method.name)
+        if qualified in called_methods or method.name in called_methods:
+            # Method bodies go out verbatim; no need to split and rejoin.
+            buf.write(method.content)
+            buf.write("\n\n")
+        else:
+            sig = method.signature.partition("{")[0]
+            buf.write(f"    {sig.strip()};  // [not expanded]\n")
+    buf.write("}")
+    return buf.getvalue()
+
+
+# ---------------------------------------------------------------------------
+# Indexing
+# ---------------------------------------------------------------------------
+
+def build_definition_index(source_files: List[str]):
+    """Parse every source file and build the global lookup tables.
+
+    Returns (file_indices, def_lookup, type_to_impls, impl_to_type).
+    """
+    def_lookup: Dict[str, List[Definition]] = defaultdict(list)
+    type_to_impls: Dict[str, List[str]] = defaultdict(list)
+    impl_to_type: Dict[str, str] = {}
+    # (filepath, start_line) pairs already indexed under each lookup name;
+    # an O(1) membership test instead of scanning the bucket, which for
+    # common method names like `new` turned insertion quadratic.
+    seen_locations: Dict[str, Set[Tuple[str, int]]] = defaultdict(set)
+
+    file_indices = parse_files(source_files)
+
+    for filepath in source_files:
+        index = file_indices[filepath]
+        for definition in index.definitions:
+            name = definition.name
+            if definition.kind == DefKind.IMPL_BLOCK:
+                impl_name = name
+                n = 2
+                while impl_name in def_lookup:
+                    impl_name = f"{name}_{n}"
+                    n += 1
+                definition.name = impl_name
+                def_lookup[impl_name] = [definition]
+
+                base = _IMPL_SUFFIX_RE.sub("", impl_name)
+                if base.startswith("impl_"):
+                    type_name = base[len("impl_"):]
+                elif "_for_" in base:
+                    type_name = base.rsplit("_for_", 1)[1]
+                else:
+                    type_name = base
+                if impl_name not in type_to_impls[type_name]:
+                    type_to_impls[type_name].append(impl_name)
+                impl_to_type[impl_name] = type_name
+
+                for method in extract_methods_from_impl(definition.content):
+                    method_def = Definition(
+                        name=method.name,
+                        kind=DefKind.METHOD,
+                        filepath=filepath,
+                        start_line=definition.start_line + method.start_line,
+                        end_line=definition.start_line + method.end_line,
+                        content=method.content,
+                        type_refs=extract_type_references(method.content, ".rs"),
+                    )
+                    loc = (filepath, method_def.start_line)
+                    if loc not in seen_locations[method.name]:
+                        seen_locations[method.name].add(loc)
+                        def_lookup[method.name].append(method_def)
+                    qualified = _qualify(type_name, method.name)
+                    if loc not in seen_locations[qualified]:
+                        seen_locations[qualified].add(loc)
+                        def_lookup[qualified].append(method_def)
+            else:
+                def_lookup[name].append(definition)
+
+    # Hand plain dicts back so no caller can grow the tables by lookup.
+    return file_indices, dict(def_lookup), dict(type_to_impls), impl_to_type
+
+
+def detect_duplicates(def_lookup: Dict[str, List[Definition]]) -> Dict[str, List[str]]:
+    """Names defined in more than one file (often a smell worth surfacing)."""
+    name_to_files: Dict[str, List[str]] = defaultdict(list)
+    for name, defs in def_lookup.items():
+        for d in defs:
+            if d.filepath not in name_to_files[name]:
+                name_to_files[name].append(d.filepath)
+    return {n: files for n, files in name_to_files.items() if len(files) > 1}
+
+
+# ---------------------------------------------------------------------------
+# Log roots
+# ---------------------------------------------------------------------------
+
+# Bytes pattern: the log is scanned memory-mapped, without decoding it.
+_LOG_ROOT_RE = _re.compile(rb"\|(CMD|API)\|([a-zA-Z_][a-zA-Z0-9_.]*)")
+
+
+def parse_log_roots(log_path: str) -> Set[str]:
+    """Command / API names observed in the app log.
+
+    The file is memory-mapped and scanned with a bytes regex in one
+    finditer call — no per-line split and no UTF-8 decode of the log
+    body, which dominate on multi-megabyte logs.  Root names are ASCII
+    identifiers, so only the matches themselves need decoding.
+    """
+    roots = set()
+    try:
+        with open(log_path, "rb") as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return roots
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                for m in _LOG_ROOT_RE.finditer(mm):
+                    roots.add(m.group(2).decode("ascii", "replace"))
+    except OSError:
+        return roots
+    return roots
+
+
+def resolve_namespaced_roots(log_roots: Set[str], def_lookup: Dict[str, List[Definition]]) -> Set[str]:
+    """Match raw log names (possibly 'Namespace.fn') to indexed definitions."""
+    resolved = set()
+    for root in log_roots:
+        if root in def_lookup:
+            resolved.add(root)
+            continue
+        if "." in root:
+            tail = root.rsplit(".", 1)[1]
+            if tail in def_lookup:
+                resolved.add(tail)
+    return resolved
+
+
+def _index_fingerprint(def_lookup: Dict[str, List[Definition]]) -> str:
+    """Stable digest of the indexed names, for cache invalidation."""
+    return hashlib.sha1("\n".join(sorted(def_lookup)).encode("utf-8")).hexdigest()
+
+
+def resolve_roots_cached(def_lookup: Dict[str, List[Definition]],
+                         raw_log_roots: Optional[Set[str]] = None) -> Set[str]:
+    """parse_log_roots + resolve_namespaced_roots, skipping both passes when
+    neither the log nor the index changed since the last run.
+
+    The resolved set is pickled beside the script, keyed on
+    (log mtime, index fingerprint).  Callers that already parsed the log
+    (e.g. on a background thread) pass the raw names via raw_log_roots
+    so a cache miss does not parse it a second time.
+    """
+    try:
+        log_mtime = os.stat(LOG_FILE_PATH).st_mtime_ns
+    except OSError:
+        log_mtime = 0
+    fingerprint = (log_mtime, _index_fingerprint(def_lookup))
+    try:
+        with open(ROOTS_CACHE_FILE, "rb") as f:
+            cached = pickle.load(f)
+        if cached.get("fingerprint") == fingerprint:
+            return cached["roots"]
+    except (OSError, pickle.UnpicklingError, EOFError, KeyError, AttributeError):
+        pass
+    if raw_log_roots is None:
+        raw_log_roots = parse_log_roots(LOG_FILE_PATH)
+    roots = resolve_namespaced_roots(raw_log_roots, def_lookup)
+    try:
+        with open(ROOTS_CACHE_FILE, "wb") as f:
+            pickle.dump({"fingerprint": fingerprint, "roots": roots}, f)
+    except OSError:
+        pass
+    return roots
+
+
+def find_module_entry_points(def_lookup: Dict[str, List[Definition]]) -> Set[str]:
+    """Fallback roots when the log has nothing: public functions in lib.rs."""
+    entry_points = set()
+    for def_name, definitions in def_lookup.items():
+        for definition in definitions:
+            if definition.filepath.endswith("lib.rs") and definition.kind == DefKind.FUNCTION:
+                entry_points.add(def_name)
+    return entry_points
+
+
+# ---------------------------------------------------------------------------
+# Dependency resolution
+# ---------------------------------------------------------------------------
+
+def resolve_dependencies(roots: Set[str],
+                         def_lookup: Dict[str, List[Definition]],
+                         type_to_impls: Dict[str, List[str]],
+                         impl_to_type: Dict[str, str],
+                         max_depth: int = MAX_DEPTH):
+    """BFS from the root functions, following calls up to max_depth hops, then
+    pull in the types (and their impls) the visited code touches.
+
+    Returns (included_names, called_methods, qualified_called,
+    processed_types); qualified_called is the Type::method subset of
+    called_methods, tracked here so consumers don't rescan every entry
+    for '::'.
+    """
+    all_func_names = set(def_lookup.keys())
+    included: Set[str] = set()
+    called_methods: Set[str] = set()
+    qualified_called: Set[str] = set()
+    needed_types: Set[str] = set()
+
+    # Definitions sharing content (duplicated methods across impls, or
+    # revisits queued from several parents) would re-scan the same string;
+    # memoize per content for the duration of this resolution.  The name
+    # set is fixed here, so content alone is a sound key.  One fused pass
+    # yields all three call shapes; the method name of a static or
+    # instance call still counts as a bare-call candidate, exactly as the
+    # old separate scans overlapped.
+    @functools.lru_cache(maxsize=None)
+    def _scan_calls(content: str):
+        calls = set()
+        statics = []
+        instance_names = []
+        for m in _CALLSITE_RE.finditer(content):
+            group = m.lastgroup
+            if group == "sm":
+                fn = m.group("sm")
+                statics.append((m.group("st"), fn))
+            elif group == "im":
+                fn = sys.intern(m.group("im"))
+                instance_names.append(fn)
+            else:
+                fn = m.group("fn")
+            if fn in all_func_names:
+                calls.add(fn)
+        return frozenset(calls), tuple(statics), tuple(instance_names)
+
+    # Level-order BFS: every definition on one depth level scans
+    # independently (pure regex work over its content), so large levels
+    # fan out over a thread pool — the regex engine runs outside the GIL
+    # for most of each scan — and the dict/set merging stays serial.
+    visited: Set[str] = set()
+    current: List[str] = sorted(roots)
+    # The serial merge below is the tightest pure-Python loop here; bind
+    # the set inserts once so each add skips an attribute lookup.
+    included_add = included.add
+    called_add = called_methods.add
+    qualified_add = qualified_called.add
+    needed_add = needed_types.add
+    for depth in range(max_depth + 1):
+        batch: List[Tuple[str, Definition]] = []
+        for name in current:
+            if name in visited:
+                continue
+            visited.add(name)
+            for definition in def_lookup.get(name, []):
+                batch.append((name, definition))
+        if not batch:
+            break
+        contents = [definition.content for _, definition in batch]
+        if len(batch) >= _SCAN_PARALLEL_THRESHOLD:
+            with ThreadPoolExecutor() as executor:
+                scans = list(executor.map(_scan_calls, contents))
+                inferred = list(executor.map(infer_instance_method_calls, contents))
+        else:
+            scans = [_scan_calls(c) for c in contents]
+            inferred = [infer_instance_method_calls(c) for c in contents]
+
+        next_names: List[str] = []
+        next_append = next_names.append
+        for (name, definition), scan, type_methods in zip(batch, scans, inferred):
+            included_add(name)
+            call_set, statics, instance_names = scan
+            calls = set(call_set)
+
+            for type_name, method_name in statics:
+                qualified = _qualify(type_name, method_name)
+                called_add(qualified)
+                qualified_add(qualified)
+                needed_add(type_name)
+                if qualified in def_lookup:
+                    calls.add(qualified)
+
+            for type_name, methods in type_methods.items():
+                for method_name in methods:
+                    qualified = _qualify(type_name, method_name)
+                    called_add(qualified)
+                    qualified_add(qualified)
+                    needed_add(type_name)
+                    if qualified in def_lookup:
+                        calls.add(qualified)
+
+            # C-level bulk inserts; instance_names is a tuple and
+            # type_refs a frozenset, so no iteration happens in Python.
+            called_methods.update(instance_names)
+            needed_types.update(definition.type_refs)
+
+            for call in calls:
+                if call not in visited:
+                    next_append(call)
+        current = next_names
+
+    # Resolve the types the visited code depends on (transitively).  The
+    # pending set dedupes on append, so a type queued from many referrers
+    # is popped once; deque keeps the front-pop O(1).
+    type_queue = deque(needed_types)
+    pending: Set[str] = set(needed_types)
+    processed_types: Set[str] = set()
+    while type_queue:
+        type_name = type_queue.popleft()
+        pending.discard(type_name)
+        processed_types.add(type_name)
+        # type_to_impls already maps each type to its impl-block names, so
+        # scanning every def_lookup key with startswith/endswith per type
+        # (O(types x defs), and prefix-matching impl_Foo onto impl_FooBar)
+        # is unnecessary.
+        lookup_names = [type_name] + type_to_impls.get(type_name, [])
+        for lookup in lookup_names:
+            for definition in def_lookup.get(lookup, []):
+                if definition.kind in _TYPE_DEFINING_KINDS:
+                    included.add(lookup)
+                    for nested_type in definition.type_refs:
+                        if (nested_type and nested_type not in processed_types
+                                and nested_type not in pending):
+                            type_queue.append(nested_type)
+                            pending.add(nested_type)
+
+    # Frozen on the way out: consumers only iterate and probe, and the
+    # immutable copies hash-probe marginally faster in the summarizer's
+    # membership checks.
+    return (frozenset(included), frozenset(called_methods),
+            frozenset(qualified_called), frozenset(processed_types))
+
+
+# ---------------------------------------------------------------------------
+# Output generation
+# ---------------------------------------------------------------------------
+
+# One precompiled alternation per extension instead of per-prefix substring
+# probes inside filter_imports: a single C-level scan per import line.
+_IGNORED_IMPORT_RES = {
+    ext: _re.compile(
+        "(?:use |from '|from \"|import )(?:"
+        + "|".join(re.escape(p) for p in prefixes)
+        + ")"
+    )
+    for ext, prefixes in IGNORED_IMPORTS.items()
+}
+
+
+def filter_imports(imports: List[str], ext: str) -> List[str]:
+    pattern = _IGNORED_IMPORT_RES.get(ext)
+    if pattern is None:
+        return list(imports)
+    return [imp for imp in imports if not pattern.search(imp)]
+
+
+# Legend text per mode, assembled once at import instead of written in
+# pieces on every extraction.
+_LEGEND_HEADER = """\
+CALCULA CODE CONTEXT
+====================
+Mode: {mode}
+Extracted from the repository based on commands/API calls observed in the
+application log, plus their transitive dependencies.
+"""
+_LEGEND_FOOTER = """\
+Request more code by replying with:
+  REQUEST_CODE: name1, name2
+"""
+_LEGEND_SUMMARIZED = (
+    _LEGEND_HEADER.format(mode="summarized")
+    + """\
+Impl blocks are summarized: methods that were never observed in a call are
+collapsed to one-line signatures marked `// [not expanded]`.
+"""
+    + _LEGEND_FOOTER
+)
+_LEGEND_FULL = (
+    _LEGEND_HEADER.format(mode="full")
+    + """\
+Impl blocks are included in full.
+"""
+    + _LEGEND_FOOTER
+)
+
+
+@functools.lru_cache(maxsize=1024)
+def _contained_spans(spans: Tuple[Tuple[int, int], ...]) -> FrozenSet[Tuple[int, int]]:
+    """The spans in `spans` strictly contained by another span.
+
+    One sweep over the spans sorted by (start, -end) with a stack of
+    active enclosing ranges replaces the old all-pairs scan: when a span
+    starts, every range still on the stack began earlier, so it is
+    contained iff some active range reaches past its end (ranges equal to
+    its own don't count).  Containment depends only on the span values,
+    so results are memoized per span set — a run that generates both the
+    summarized and full bundles filters each file once."""
+    active: List[Tuple[int, int]] = []
+    contained = set()
+    for span in sorted(spans, key=lambda sp: (sp[0], -sp[1])):
+        while active and active[-1][1] < span[0]:
+            active.pop()
+        for s, e in reversed(active):
+            if e >= span[1] and (s, e) != span:
+                contained.add(span)
+                break
+        active.append(span)
+    return frozenset(contained)
+
+
+# Config bodies are read in one call each; below this many files the
+# thread fan-out costs more than the reads.
+_EMIT_PARALLEL_THRESHOLD = 4
+
+
+def _read_config_file(filepath: str) -> str:
+    try:
+        with open(filepath, "r", encoding="utf-8", errors="replace") as f:
+            return f.read()
+    except OSError:
+        return "(unreadable)\n"
+
+
+def generate_code_content(included: FrozenSet[str],
+                          def_lookup: Dict[str, List[Definition]],
+                          called_methods: FrozenSet[str],
+                          file_indices: Dict[str, FileIndex],
+                          config_files: List[str],
+                          project_root: str,
+                          output_mode: str,
+                          jobs: Optional[int] = None) -> str:
+    # Chunks collected in a list and joined once at the end: per-write
+    # method dispatch and buffer resizing in StringIO add up over the tens
+    # of thousands of fragments a large bundle emits.
+    parts: List[str] = []
+    append = parts.append
+    append(_LEGEND_SUMMARIZED if output_mode == "summarized" else _LEGEND_FULL)
+    sep = "=" * 70
+
+    # Every path below project_root shares the prefix; one slice beats
+    # scanning the whole path for the root substring per file.
+    root_len = len(project_root.rstrip(os.sep)) + 1
+
+    defs_by_file: Dict[str, List[Definition]] = defaultdict(list)
+    for name in included:
+        for definition in def_lookup.get(name, []):
+            if definition not in defs_by_file[definition.filepath]:
+                defs_by_file[definition.filepath].append(definition)
+
+    for filepath in sorted(defs_by_file.keys()):
+        file_defs = sorted(defs_by_file[filepath], key=lambda d: d.start_line)
+
+        # Remove definitions that are fully contained within other definitions
+        # in the same file (e.g. a method already covered by its impl block).
+        spans = tuple(sorted((d.start_line, d.end_line) for d in file_defs))
+        contained = _contained_spans(spans)
+        filtered = [d for d in file_defs
+                    if (d.start_line, d.end_line) not in contained]
+
+        rel_path = filepath[root_len:]
+        append(f"\n{sep}\nFILE: {rel_path}\n{sep}\n")
+
+        index = file_indices.get(filepath)
+        if index and index.imports:
+            ext = os.path.splitext(filepath)[1]
+            for imp in filter_imports(index.imports, ext):
+                append(imp + "\n")
+            append("\n")
+
+        for definition in filtered:
+            if output_mode == "summarized" and definition.kind == DefKind.IMPL_BLOCK:
+                append(create_summarized_impl(definition, called_methods))
+                append("\n\n")
+            else:
+                append(f"// [{definition.kind.value}] {definition.name}\n"
+                       f"{definition.content}\n\n")
+
+    if config_files:
+        append(f"\n{sep}\nCONFIG FILES\n{sep}\n")
+        # The definitions above are already in memory; the config bodies
+        # are the only disk reads left, so they fan out over threads when
+        # there are enough of them.  map() keeps result order, so the
+        # concatenation stays deterministic.
+        if len(config_files) >= _EMIT_PARALLEL_THRESHOLD and (jobs is None or jobs > 1):
+            with ThreadPoolExecutor(max_workers=jobs) as executor:
+                bodies = list(executor.map(_read_config_file, config_files))
+        else:
+            bodies = [_read_config_file(fp) for fp in config_files]
+        for config_path, body in zip(config_files, bodies):
+            rel_path = config_path[root_len:]
+            append(f"\n--- {rel_path} ---\n")
+            append(body)
+
+    return "".join(parts)
+
+
+def generate_output(included: FrozenSet[str],
+                    def_lookup: Dict[str, List[Definition]],
+                    called_methods: FrozenSet[str],
+                    file_indices: Dict[str, FileIndex],
+                    config_files: List[str],
+                    output_mode: str,
+                    jobs: Optional[int] = None) -> str:
+    final_output = generate_code_content(included, def_lookup, called_methods,
+                                         file_indices, config_files,
+                                         PROJECT_ROOT, output_mode, jobs)
+    # Encode once and write the bytes in one unbuffered call; the text
+    # layer would re-encode in 8 KiB chunks through its incremental
+    # encoder (and translate newlines on Windows, which nothing reading
+    # this bundle needs).
+    with open(OUTPUT_FILE, "wb", buffering=0) as f:
+        f.write(final_output.encode("utf-8"))
+    return final_output
+
+
+def generate_outline_output(file_indices: Dict[str, FileIndex],
+                            def_lookup: Dict[str, List[Definition]],
+                            roots: Set[str]) -> None:
+    """Write a per-file outline of every indexed definition."""
+    # Assemble the whole outline in memory and write it in one shot instead
+    # of one f.write per definition.
+    parts = ["PROJECT OUTLINE\n", "=" * 70 + "\n"]
+    for filepath in sorted(file_indices.keys()):
+        index = file_indices[filepath]
+        if not index.definitions:
+            continue
+        parts.append("\n")
+        parts.append(_rel(filepath) + "\n")
+        for definition in index.definitions:
+            marker = " *" if definition.name in roots else ""
+            parts.append(f"  [{definition.kind.value}] {definition.name}{marker}\n")
+    duplicates = detect_duplicates(def_lookup)
+    if duplicates:
+        parts.append("\n")
+        parts.append("=" * 70 + "\n")
+        parts.append("DUPLICATE NAMES\n")
+        for name in sorted(duplicates.keys()):
+            parts.append(f"  {name}: {len(duplicates[name])} files\n")
+    with open(OUTLINE_FILE, "w", encoding="utf-8") as f:
+        f.write("".join(parts))
+
+
+def generate_requested_code(requested_sorted: Tuple[str, ...],
+                            def_lookup: Dict[str, List[Definition]],
+                            type_to_impls: Dict[str, List[str]],
+                            impl_to_type: Dict[str, str],
+                            file_indices: Dict[str, FileIndex],
+                            config_files: List[str]) -> None:
+    """Extract context for an explicitly requested (pre-sorted) name tuple."""
+    known = []
+    unknown = []
+    for name in requested_sorted:
+        (known if name in def_lookup else unknown).append(name)
+    if unknown:
+        _info(f"[WARN] Unknown names skipped: {', '.join(unknown)}")
+    if not known:
+        _info("[WARN] No requested names resolved; nothing to extract")
+        return
+    included, called_methods, _, _ = resolve_dependencies(
+        frozenset(known), def_lookup, type_to_impls, impl_to_type, max_depth=1)
+    final_output = generate_output(included, def_lookup, called_methods,
+                                   file_indices, [], OUTPUT_MODE)
+    _info(f"[INFO] Wrote {len(final_output)} chars to {OUTPUT_FILE}")
+    copy_to_clipboard(final_output)
+
+
+# ---------------------------------------------------------------------------
+# Clipboard
+# ---------------------------------------------------------------------------
+
+def copy_to_clipboard(text: str) -> None:
+    """Copy text to the Windows clipboard via clip.exe (no-op elsewhere)."""
+    if os.name != "nt":
+        return
+    try:
+        # No shell=True: clip.exe is on PATH, and skipping cmd.exe saves a
+        # process spawn per run.
+        process = subprocess.Popen(["clip"], stdin=subprocess.PIPE)
+        process.communicate(text.encode("utf-16le", errors="replace"))
+        _info("[INFO] Copied to clipboard")
+    except OSError as exc:
+        _info(f"[WARN] Clipboard copy failed: {exc}")
+
+
+# ---------------------------------------------------------------------------
+# Request state
+# ---------------------------------------------------------------------------
+
+try:
+    # orjson decodes roughly 5x faster than stdlib json; the state file is
+    # read by every request-workflow command, so take it when available.
+    import orjson as _fast_json
+except ImportError:
+    _fast_json = None
+
+
+def load_request_state() -> dict:
+    if os.path.exists(STATE_FILE):
+        try:
+            with open(STATE_FILE, "rb") as f:
+                raw = f.read()
+            if _fast_json is not None:
+                return _fast_json.loads(raw)
+            return json.loads(raw)
+        except (OSError, ValueError):
+            pass
+    return {"requested": []}
+
+
+def save_request_state(state: dict) -> None:
+    if _fast_json is not None:
+        with open(STATE_FILE, "wb") as f:
+            f.write(_fast_json.dumps(state, option=_fast_json.OPT_INDENT_2))
+    else:
+        with open(STATE_FILE, "w", encoding="utf-8") as f:
+            json.dump(state, f, indent=2)
+
+
+# ---------------------------------------------------------------------------
+# Entry point
+# ---------------------------------------------------------------------------
+
+def _build_index():
+    """Walk the repo and build the definition index.
+
+    Single funnel for every command that needs the index, so commands that
+    don't (reset/status/help) never pay for the walk, and index caching has
+    one place to hook into.
+    """
+    source_files, config_files = get_all_source_files(PROJECT_ROOT)
+    file_indices, def_lookup, type_to_impls, impl_to_type = build_definition_index(source_files)
+    return source_files, config_files, file_indices, def_lookup, type_to_impls, impl_to_type
+
+
+def _cmd_reset(args: argparse.Namespace) -> None:
+    if os.path.exists(STATE_FILE):
+        os.remove(STATE_FILE)
+    _info("[INFO] Request state cleared")
+
+
+def _cmd_status(args: argparse.Namespace) -> None:
+    state = load_request_state()
+    requested = state.get("requested", [])
+    if requested:
+        _info(f"[INFO] {len(requested)} requested: {', '.join(sorted(requested))}")
+    else:
+        _info("[INFO] No pending requests")
+
+
+def _run_requested(requested_sorted: Tuple[str, ...]) -> None:
+    _info(f"[INFO] Requesting: {', '.join(requested_sorted)}")
+    _, config_files, file_indices, def_lookup, type_to_impls, impl_to_type = _build_index()
+    generate_requested_code(requested_sorted, def_lookup, type_to_impls, impl_to_type,
+                            file_indices, config_files)
+
+
+def _cmd_request(args: argparse.Namespace) -> None:
+    state = load_request_state()
+    requested = set(state.get("requested", []))
+    requested.update(n.strip() for n in args.names.split(",") if n.strip())
+    requested_sorted = tuple(sorted(requested))
+    state["requested"] = list(requested_sorted)
+    save_request_state(state)
+    _run_requested(requested_sorted)
+
+
+def _cmd_request_file(args: argparse.Namespace) -> None:
+    request_path = args.path
+    if not os.path.exists(request_path):
+        _info(f"[WARN] No such file: {request_path}")
+        return
+    state = load_request_state()
+    requested = set(state.get("requested", []))
+    with open(request_path, "r", encoding="utf-8", errors="replace") as f:
+        for line in f:
+            if line.startswith("REQUEST_CODE:") or line.startswith("REQUEST_MORE:"):
+                _, _, rest = line.partition(":")
+                requested.update(n.strip() for n in rest.split(",") if n.strip())
+    if not requested:
+        _info("[INFO] No REQUEST_CODE/REQUEST_MORE lines found")
+        return
+    requested_sorted = tuple(sorted(requested))
+    state["requested"] = list(requested_sorted)
+    save_request_state(state)
+    _run_requested(requested_sorted)
+
+
+def _cmd_list(args: argparse.Namespace) -> None:
+    _, _, file_indices, def_lookup, type_to_impls, impl_to_type = _build_index()
+    lines = []
+    for name in sorted(def_lookup.keys()):
+        defs = def_lookup[name]
+        if not defs:
+            continue
+        locations = [_rel(d.filepath) for d in defs]
+        lines.append(f"  {name} ({defs[0].kind.value}) - {locations[0]}\n")
+    sys.stdout.write("".join(lines))
+
+
+def _cmd_search(args: argparse.Namespace) -> None:
+    pattern_arg = args.pattern.lower()
+    if len(pattern_arg) <= 2 and not args.all:
+        _info("[WARN] Pattern shorter than 3 chars would enumerate most of the "
+              "index; pass --all to force it")
+        return
+    _, _, file_indices, def_lookup, type_to_impls, impl_to_type = _build_index()
+    lines = []
+    for name in sorted(def_lookup.keys()):
+        if pattern_arg not in name.lower():
+            continue
+        defs = def_lookup[name]
+        if not defs:
+            continue
+        locations = [_rel(d.filepath) for d in defs]
+        lines.append(f"  {name} ({defs[0].kind.value}) - {locations[0]}\n")
+    sys.stdout.write("".join(lines))
+
+
+def _cmd_outline(args: argparse.Namespace) -> None:
+    _, _, file_indices, def_lookup, type_to_impls, impl_to_type = _build_index()
+    roots = resolve_roots_cached(def_lookup)
+    generate_outline_output(file_indices, def_lookup, roots)
+    _info(f"[INFO] Outline written to {OUTLINE_FILE}")
+
+
+def _info(*args) -> None:
+    """Bracketed diagnostics go to stderr; stdout carries only real output."""
+    print(*args, file=sys.stderr)
+
+
+class _StatusBuffer:
+    """Batches status lines into one stderr write per flush.
+
+    The extract pipeline prints a few dozen lines; emitting them one
+    print() at a time costs a lock + write syscall each.  Phase headers
+    flush immediately so progress still shows before the long steps.
+    Status goes to stderr, like every other diagnostic line, so piped
+    stdout stays clean.
+    """
+
+    def __init__(self) -> None:
+        self._lines: List[str] = []
+
+    def line(self, text: str) -> None:
+        self._lines.append(text)
+
+    def flush(self) -> None:
+        if self._lines:
+            sys.stderr.write("\n".join(self._lines) + "\n")
+            sys.stderr.flush()
+            self._lines.clear()
+
+
+def _cmd_extract(args: argparse.Namespace) -> None:
+    """Default command: the full extraction pipeline."""
+    global OUTPUT_MODE
+    mode = getattr(args, "mode", None)
+    if mode in ("full", "summarized"):
+        OUTPUT_MODE = mode
+
+    # Bound methods hoisted once; the phases below call them dozens of
+    # times and a local lookup is cheaper than attribute resolution.
+    out = _StatusBuffer()
+    line, flush = out.line, out.flush
+    _join = ", ".join
+    # The log parse only touches the log file, so it overlaps with the
+    # source walk and index build; the result is collected in phase 3.
+    log_pool = ThreadPoolExecutor(max_workers=1)
+    log_future = log_pool.submit(parse_log_roots, LOG_FILE_PATH)
+    line("[INFO] Phase 1/5: Scanning source files...")
+    flush()
+    source_files, config_files = get_all_source_files(PROJECT_ROOT)
+    line(f"[INFO]   Found {len(source_files)} source files")
+
+    line("[INFO] Phase 2/5: Building definition index...")
+    flush()
+    file_indices, def_lookup, type_to_impls, impl_to_type = build_definition_index(source_files)
+    total_defs = sum(map(len, def_lookup.values()))
+    line(f"[INFO]   Indexed {total_defs} definitions in {len(file_indices)} files")
+    if type_to_impls:
+        impl_types = list(islice(type_to_impls, 5))
+        suffix = ", ..." if len(type_to_impls) > 5 else ""
+        line(f"[INFO]   Impl blocks for: {_join(impl_types)}{suffix}")
+
+    line("[INFO] Phase 3/5: Parsing log roots...")
+    flush()
+    roots = resolve_roots_cached(def_lookup, log_future.result())
+    log_pool.shutdown()
+    if not roots:
+        line("[INFO]   No log roots resolved; falling back to module entry points")
+        roots = find_module_entry_points(def_lookup)
+    roots_preview = sorted(roots)[:8]
+    line(f"[INFO]   {len(roots)} roots: {_join(roots_preview)}")
+
+    line("[INFO] Phase 4/5: Resolving dependencies...")
+    flush()
+    included, called_methods, qualified_called, processed_types = resolve_dependencies(
+        roots, def_lookup, type_to_impls, impl_to_type, MAX_DEPTH)
+    line(f"[INFO]   {len(included)} definitions included, "
+             f"{len(processed_types)} types processed")
+
+    # The dump below costs a pass over the tracked calls plus selection
+    # work; skip it unless explicitly asked for.
+    if OUTPUT_MODE == "summarized" and getattr(args, "debug", False):
+        # One fused pass: the per-type buckets and the 15-entry preview
+        # (a bounded sorted list, insort + pop) are built together, so
+        # the qualified set is walked once instead of twice.
+        # resolve_dependencies tracked the qualified subset as it added
+        # entries, so no '::' rescan is needed here.
+        preview: List[str] = []
+        type_calls: Dict[str, Set[str]] = defaultdict(set)
+        for m in qualified_called:
+            if len(preview) < 15 or m < preview[-1]:
+                insort(preview, m)
+                if len(preview) > 15:
+                    preview.pop()
+            t, method = m.rsplit("::", 1)
+            type_calls[t].add(method)
+        line(f"[DEBUG] Tracked {len(qualified_called)} qualified method calls")
+        for m in preview:
+            line(f"[DEBUG]   {m}")
+        line("[DEBUG] Methods by type:")
+        for t in heapq.nsmallest(10, type_calls):
+            methods = heapq.nsmallest(5, type_calls[t])
+            line(f"[DEBUG]   {t}: {_join(methods)}")
+
+    line("[INFO] Phase 5/5: Generating output...")
+    flush()
+    final_output = generate_output(included, def_lookup, called_methods,
+                                   file_indices, config_files, OUTPUT_MODE,
+                                   jobs=getattr(args, "jobs", None))
+    line(f"[INFO] Wrote {len(final_output)} chars to {OUTPUT_FILE}")
+    flush()
+    copy_to_clipboard(final_output)
+
+
+def _build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="context_extractor.py",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        description=_HELP_TEMPLATE.format(
+            PROJECT_ROOT=PROJECT_ROOT,
+            LOG_FILE_PATH=LOG_FILE_PATH,
+            OUTPUT_FILE=OUTPUT_FILE,
+            OUTLINE_FILE=OUTLINE_FILE,
+            STATE_FILE=STATE_FILE,
+            MAX_DEPTH=MAX_DEPTH,
+        ),
+    )
+    parser.add_argument("-v", "--debug", dest="debug", action="store_true",
+                        help="print the per-call debug dump during extraction")
+    parser.add_argument("--jobs", type=int, default=None, metavar="N",
+                        help="worker threads for the output stage's file "
+                             "reads (default: executor's own sizing)")
+    parser.add_argument("--profile", action="store_true",
+                        help="run the command under cProfile and dump "
+                             "extractor.pstats beside the script")
+    sub = parser.add_subparsers(dest="cmd")
+    for mode in ("full", "summarized"):
+        sub.add_parser(mode).set_defaults(func=_cmd_extract, mode=mode)
+    sub.add_parser("outline").set_defaults(func=_cmd_outline)
+    sub.add_parser("list").set_defaults(func=_cmd_list)
+    p = sub.add_parser("search")
+    p.add_argument("pattern")
+    p.add_argument("--all", action="store_true",
+                   help="allow patterns shorter than 3 chars")
+    p.set_defaults(func=_cmd_search)
+    p = sub.add_parser("request")
+    p.add_argument("names", help="comma-separated definition names")
+    p.set_defaults(func=_cmd_request)
+    p = sub.add_parser("request-file")
+    p.add_argument("path", help="transcript with REQUEST_CODE:/REQUEST_MORE: lines")
+    p.set_defaults(func=_cmd_request_file)
+    sub.add_parser("status").set_defaults(func=_cmd_status)
+    sub.add_parser("reset").set_defaults(func=_cmd_reset)
+    return parser
+
+
+# Built once at import so repeated in-process invocations share the parser.
+_PARSER = _build_parser()
+
+
+def main():
+    # Dispatch is a direct handler reference stamped on each subparser via
+    # set_defaults(func=...) -- no chain of string comparisons, and an
+    # unrecognized command errors out at parse time instead of falling
+    # through to the default extraction.
+    args = _PARSER.parse_args()
+    handler = getattr(args, "func", _cmd_extract)
+    if args.profile:
+        # Imported lazily: profiling is a tuning aid, not a per-run cost.
+        import cProfile
+        import pstats
+
+        profiler = cProfile.Profile()
+        profiler.runcall(handler, args)
+        stats_path = os.path.join(SCRIPT_DIR, "extractor.pstats")
+        profiler.dump_stats(stats_path)
+        pstats.Stats(profiler).sort_stats("cumulative").print_stats(20)
+        _info(f"[INFO] Profile written to {stats_path}")
+    else:
+        handler(args)
+
+
+if __name__ == "__main__":
+    main()
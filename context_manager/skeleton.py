@@ -0,0 +1,736 @@
+"""Skeleton generator for the Calcula repository.
+
+Produces a compressed one-entry-per-file map of the repo — role, leading
+doc comment, imports/exports, type definitions, function signatures and
+reverse dependencies — small enough to paste into an AI session as a
+stand-in for the full tree.  The `build` subcommand emits the full text of
+a chosen set of files ("territory") plus the project structure.
+
+Usage: python skeleton.py [scan|build <files...>]
+"""
+
+import functools
+import json
+import os
+import re
+import subprocess
+import sys
+import time
+from collections import defaultdict, deque
+from io import StringIO
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Set, Tuple
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(SCRIPT_DIR)
+SKELETON_FILE = os.path.join(SCRIPT_DIR, "skeleton.txt")
+TERRITORY_FILE = os.path.join(SCRIPT_DIR, "territory.txt")
+CACHE_FILE = os.path.join(SCRIPT_DIR, ".context_cache.json")
+
+SOURCE_EXTENSIONS = (".rs", ".ts", ".tsx", ".py")
+
+IGNORE_DIRS = {
+    ".git",
+    "node_modules",
+    "target",
+    "dist",
+    "build",
+    "__pycache__",
+    ".venv",
+    "e2e",
+    "test-stubs",
+    "public",
+    "context_manager",
+}
+
+# Import prefixes that carry no information in a skeleton.
+IGNORED_IMPORT_PREFIXES = {
+    ".rs": ("std::", "serde", "log::", "once_cell", "lazy_static"),
+    ".ts": ("react", "react-dom", "@tauri-apps"),
+    ".tsx": ("react", "react-dom", "@tauri-apps"),
+    ".py": ("os", "sys", "re", "json", "typing"),
+}
+
+# Directory/filename shapes that tell us what a file is for.  Patterns are
+# compiled once at import; classify_file_role only calls .search().
+FILE_ROLES = {
+    "component": [re.compile(r"/components/"), re.compile(r"\.tsx$")],
+    "hook": [re.compile(r"/hooks/"), re.compile(r"/use[A-Z]\w*\.tsx?$")],
+    "state": [re.compile(r"/stores?/"), re.compile(r"slice\.ts$")],
+    "api": [re.compile(r"/api/"), re.compile(r"bridge\.ts$")],
+    "util": [re.compile(r"/utils?/")],
+    "types": [re.compile(r"/types/"), re.compile(r"\.d\.ts$")],
+    "backend": [re.compile(r"\.rs$")],
+}
+
+# Optional DFA-backed engine for the hot alternation patterns: set
+# CONTEXT_MANAGER_RE2=1 with google-re2 installed to get linear-time
+# matching with no backtracking; silently falls back to stdlib re.
+if os.environ.get("CONTEXT_MANAGER_RE2") == "1":
+    try:
+        import re2 as _re
+    except ImportError:
+        _re = re
+else:
+    _re = re
+
+# Export extraction: braces form is the only genuinely irregular shape left
+# now that imports/exports are prefix-scanned by hand.
+_JS_EXPORT_BRACES = _re.compile(r"export\s*\{([^}]*)\}")
+
+# Type definitions: one alternation per language instead of trying each
+# shape's pattern in turn, so a line costs a single regex dispatch.
+_TS_TYPE_RE = _re.compile(
+    r"(?:export\s+)?"
+    r"(?:interface\s+(?P<iname>[A-Za-z_]\w*)"
+    r"|(?:const\s+)?enum\s+(?P<ename>[A-Za-z_]\w*)"
+    r"|type\s+(?P<tname>[A-Za-z_]\w*)\s*=)")
+_RS_TYPE_RE = _re.compile(
+    r"(?:pub\s+)?"
+    r"(?:struct\s+(?P<sname>[A-Za-z_]\w*)"
+    r"|enum\s+(?P<ename>[A-Za-z_]\w*)"
+    r"|trait\s+(?P<trname>[A-Za-z_]\w*)"
+    r"|type\s+(?P<tyname>[A-Za-z_]\w*)\s*=)")
+
+# Signatures.  The three JS shapes are unioned; alternation preserves the
+# old first-match-wins order.
+_RS_SIG = _re.compile(r"\s*(?:pub\s+)?(?:async\s+)?fn\s+[A-Za-z_]\w*\s*(?:<[^>]*>)?\([^)]*\)?[^{;]*")
+_JS_SIG_RE = _re.compile("|".join((
+    r"\s*(?:export\s+)?(?:default\s+)?(?:async\s+)?function\s+[A-Za-z_]\w*\s*\([^)]*\)?[^{]*",
+    r"\s*export\s+(?:const|let)\s+[A-Za-z_]\w*\s*[=:][^;]*",
+    r"\s*(?:export\s+)?const\s+[A-Za-z_]\w*\s*=\s*(?:async\s+)?\([^)]*\)?\s*(?::[^=]*)?=>",
+)))
+_PY_SIG = _re.compile(r"\s*(?:async\s+)?def\s+[A-Za-z_]\w*\s*\([^)]*\)?[^:]*")
+
+# Keywords stripped from displayed signatures, applied in one pass.
+_SIG_NOISE_RE = _re.compile(r"\b(?:export|async)\s+")
+
+
+# ---------------------------------------------------------------------------
+# Per-file extraction
+# ---------------------------------------------------------------------------
+
+def _doc_line(state: "_ParseState", s: str) -> None:
+    """Feed one stripped line to the leading-doc-comment scanner.
+
+    Dispatches on the first character instead of running a startswith
+    chain plus a ten-marker strip loop: each comment style maps straight
+    to the prefix length to cut.  Gives up after 50 lines — a file whose
+    header hasn't resolved by then has no doc comment worth showing.
+    """
+    state.doc_lines += 1
+    if state.doc_lines > 50:
+        state.doc_done = True
+        return
+    if not s:
+        return
+    c = s[0]
+    if c == "/":
+        if s.startswith("///") or s.startswith("//!"):
+            strip = 3
+        elif s.startswith("//") or s.startswith("/*"):
+            strip = 2
+        else:
+            state.doc_done = True
+            return
+    elif c == "*":
+        strip = 2 if s.startswith("*/") else 1
+    elif c == "#":
+        strip = 1
+    elif c == '"':
+        if s.startswith('"""'):
+            strip = 3
+        else:
+            state.doc_done = True
+            return
+    elif c == "'":
+        if s.startswith("'''"):
+            strip = 3
+        else:
+            state.doc_done = True
+            return
+    else:
+        state.doc_done = True
+        return
+    clean = s[strip:].strip().rstrip('"\'')
+    if clean and not clean.startswith("!"):
+        state.doc = clean
+        state.doc_done = True
+
+
+def _quoted_after(s: str, anchor: str) -> str:
+    """The string literal following `anchor` in s, or '' if absent."""
+    i = s.find(anchor)
+    if i < 0:
+        return ""
+    i += len(anchor)
+    while i < len(s) and s[i] in " (":
+        i += 1
+    if i >= len(s) or s[i] not in "'\"":
+        return ""
+    quote = s[i]
+    j = s.find(quote, i + 1)
+    return s[i + 1:j] if j > i else ""
+
+
+def _token_after(s: str, prefix: str, stop: str = " ") -> str:
+    """The whitespace/stop-delimited token following `prefix` in s."""
+    rest = s[len(prefix):].lstrip()
+    for k, ch in enumerate(rest):
+        if ch in stop or ch.isspace():
+            return rest[:k]
+    return rest
+
+
+def _parse_ts_file(f, state: "_ParseState") -> None:
+    """Fused per-line extraction for .ts/.tsx files.
+
+    Import statements are parsed with plain prefix/substring scans — no
+    regex; they are rigid enough that startswith + a quote scan covers
+    every form we meet.  Appends are pre-bound as locals: this loop runs
+    once per line of every frontend file.
+    """
+    ext = state.ext
+    imports_append = state.imports.append
+    exports_append = state.add_export
+    types_append = state.types.add
+    sigs_append = state.signatures.append
+    for line in f:
+        s = line.strip()
+        if not state.doc_done:
+            _doc_line(state, s)
+        c = s[0] if s else ""
+        target = ""
+        if (c == "i" or c == "e") and (s.startswith("import ") or s.startswith("export ")):
+            target = _quoted_after(s, "from")
+        if not target and "require(" in s:
+            target = _quoted_after(s, "require")
+        if not target and "import(" in s:
+            target = _quoted_after(s, "import")
+        if target and not is_ignored_import(target, ext):
+            imports_append(target)
+        if c == "e" and s.startswith("export "):
+            name = _identifier_after_keywords(s[7:], _JS_DECL_KEYWORDS)
+            if name:
+                exports_append(name)
+            else:
+                m = _JS_EXPORT_BRACES.search(s)
+                if m:
+                    for name in m.group(1).split(","):
+                        name = name.strip().split(" as ")[-1].strip()
+                        if name:
+                            exports_append(name)
+        m = _TS_TYPE_RE.search(s)
+        if m:
+            types_append(m.group("iname") or m.group("ename") or m.group("tname"))
+        if s and not s.startswith("import "):
+            m = _JS_SIG_RE.match(line)
+            if m:
+                sigs_append(compress_signature(m.group(0)))
+
+
+def _parse_rs_file(f, state: "_ParseState") -> None:
+    """Fused per-line extraction for .rs files."""
+    ext = state.ext
+    imports_append = state.imports.append
+    exports_append = state.add_export
+    types_append = state.types.add
+    sigs_append = state.signatures.append
+    for line in f:
+        s = line.strip()
+        if not state.doc_done:
+            _doc_line(state, s)
+        if s.startswith("use "):
+            target = _token_after(s, "use ", stop=";{ ")
+            if target and not is_ignored_import(target, ext):
+                imports_append(target)
+            continue
+        if s.startswith("pub use "):
+            target = _token_after(s, "pub use ", stop=";{ ")
+            if target and not is_ignored_import(target, ext):
+                imports_append(target)
+            continue
+        if s.startswith("pub "):
+            name = _identifier_after_keywords(s[4:], _RS_DECL_KEYWORDS)
+            if name:
+                exports_append(name)
+        m = _RS_TYPE_RE.match(s)
+        if m:
+            types_append(m.group("sname") or m.group("ename")
+                         or m.group("trname") or m.group("tyname"))
+        if s:
+            m = _RS_SIG.match(line)
+            if m:
+                sigs_append(compress_signature(m.group(0)))
+
+
+def _parse_py_file(f, state: "_ParseState") -> None:
+    """Fused per-line extraction for .py files."""
+    ext = state.ext
+    imports_append = state.imports.append
+    exports_append = state.add_export
+    sigs_append = state.signatures.append
+    for line in f:
+        s = line.strip()
+        if not state.doc_done:
+            _doc_line(state, s)
+        if s.startswith("from "):
+            target = _token_after(s, "from ")
+            if target and not is_ignored_import(target, ext):
+                imports_append(target)
+            continue
+        if s.startswith("import "):
+            target = _token_after(s, "import ", stop=" ,")
+            if target and not is_ignored_import(target, ext):
+                imports_append(target)
+            continue
+        if s.startswith("def ") or s.startswith("class "):
+            name = s.split(None, 1)[1].split("(")[0].split(":")[0].strip()
+            if name and not name.startswith("_"):
+                exports_append(name)
+        if s:
+            m = _PY_SIG.match(line)
+            if m:
+                sigs_append(compress_signature(m.group(0)))
+
+
+def _identifier_after_keywords(s: str, keywords: Tuple[str, ...]) -> str:
+    """Skip leading declaration keywords and return the next identifier."""
+    words = s.split()
+    for word in words:
+        if word in keywords:
+            continue
+        name = word
+        for k, ch in enumerate(name):
+            if not (ch.isalnum() or ch == "_"):
+                name = name[:k]
+                break
+        return name if name.isidentifier() else ""
+    return ""
+
+
+_JS_DECL_KEYWORDS = ("default", "async", "function", "const", "let", "var",
+                     "class", "interface", "type", "enum", "abstract")
+_RS_DECL_KEYWORDS = ("async", "fn", "struct", "enum", "trait", "type", "const",
+                     "static", "unsafe")
+
+
+def compress_signature(sig: str) -> str:
+    """Collapse a signature onto one line and trim it for the skeleton."""
+    sig = " ".join(sig.split())
+    if len(sig) > 100:
+        sig = sig[:97] + "..."
+    return sig
+
+
+class _ParseState:
+    """Accumulator for one file: fed a line at a time, one streaming pass."""
+
+    __slots__ = ("ext", "doc", "doc_done", "doc_lines",
+                 "imports", "exports", "_exports_seen", "types", "signatures")
+
+    def __init__(self, ext: str):
+        self.ext = ext
+        self.doc = ""
+        self.doc_done = False
+        self.doc_lines = 0
+        self.imports: List[str] = []
+        self.exports: List[str] = []
+        self._exports_seen: Set[str] = set()
+        self.signatures: List[str] = []
+        self.types: Set[str] = set()
+
+    def add_export(self, name: str) -> None:
+        """Record an export once, in first-seen order.
+
+        A name can surface twice — its declaration plus a trailing
+        `export default Name;` re-export — and duplicates would waste
+        slots in the capped display list.
+        """
+        if name not in self._exports_seen:
+            self._exports_seen.add(name)
+            self.exports.append(name)
+
+
+# One fused handler per extension, picked once per file — no per-line
+# extension branching.
+_PARSE_HANDLERS = {
+    ".rs": _parse_rs_file,
+    ".ts": _parse_ts_file,
+    ".tsx": _parse_ts_file,
+    ".py": _parse_py_file,
+}
+
+
+def parse_file(full_path: str, ext: str) -> Optional[_ParseState]:
+    """Stream a file through the fused extractor for its extension."""
+    state = _ParseState(ext)
+    try:
+        with open(full_path, "r", encoding="utf-8", errors="replace",
+                  buffering=128 * 1024) as f:
+            _PARSE_HANDLERS[ext](f, state)
+    except OSError:
+        return None
+    return state
+
+
+@functools.lru_cache(maxsize=None)
+def classify_file_role(filepath: str) -> str:
+    """Coarse role tag derived from where a file lives and how it's named."""
+    filepath_lower = filepath.lower().replace("\\", "/")
+    for role, patterns in FILE_ROLES.items():
+        for pattern in patterns:
+            if pattern.search(filepath_lower):
+                return role
+    return "misc"
+
+
+@functools.lru_cache(maxsize=None)
+def is_ignored_import(path_str: str, extension: str) -> bool:
+    """True for framework/stdlib imports that add nothing to the skeleton."""
+    for prefix in IGNORED_IMPORT_PREFIXES.get(extension, ()):
+        if path_str.startswith(prefix):
+            return True
+    return False
+
+
+# ---------------------------------------------------------------------------
+# Dependency graph
+# ---------------------------------------------------------------------------
+
+_RESOLVE_EXTS = ("", ".ts", ".tsx", ".js", ".jsx", ".rs", ".py",
+                 "/index.ts", "/index.tsx", "/mod.rs", "/__init__.py")
+
+
+def resolve_import_to_file(import_path: str, current_file: str, all_files: Set[str],
+                           basename_index: Dict[str, List[str]]) -> Optional[str]:
+    """Map an import string to a repo-relative file path, if it is local.
+
+    Non-relative imports go through a basename index built once per graph
+    instead of scanning every file per import.
+    """
+    if import_path.startswith("."):
+        base_dir = os.path.dirname(current_file)
+        candidate = os.path.normpath(os.path.join(base_dir, import_path)).replace("\\", "/")
+        for ext in _RESOLVE_EXTS:
+            if candidate + ext in all_files:
+                return candidate + ext
+        return None
+    tail = import_path.replace("::", "/").replace(".", "/").rsplit("/", 1)[-1]
+    candidates = basename_index.get(tail)
+    if not candidates:
+        return None
+    if len(candidates) == 1:
+        return candidates[0]
+    # Several files share the basename: prefer the one closest to the
+    # importing file (longest shared leading path).
+    current_dir = os.path.dirname(current_file)
+    best, best_shared = candidates[0], -1
+    for candidate in candidates:
+        shared = len(os.path.commonprefix([os.path.dirname(candidate), current_dir]))
+        if shared > best_shared:
+            best, best_shared = candidate, shared
+    return best
+
+
+def build_dependency_graph(file_data: Dict[str, dict], all_files: Set[str]) -> None:
+    """Fill in imports_resolved and used_by for every scanned file."""
+    # Built from the sorted file list so the closest-path tie-break in
+    # resolve_import_to_file sees candidates in a stable order; iterating
+    # the set directly made shared-basename resolution vary with the
+    # per-process hash seed.
+    basename_index: Dict[str, List[str]] = defaultdict(list)
+    for f in sorted(all_files):
+        basename_index[os.path.basename(f).rsplit(".", 1)[0]].append(f)
+    for filepath, data in file_data.items():
+        data["used_by"] = set()
+    for filepath, data in file_data.items():
+        resolved = set()
+        for imp in data["imports"]:
+            target = resolve_import_to_file(imp, filepath, all_files, basename_index)
+            if target and target != filepath:
+                resolved.add(target)
+                if target in file_data:
+                    file_data[target]["used_by"].add(filepath)
+        data["imports_resolved"] = sorted(resolved)
+    for filepath, data in file_data.items():
+        data["used_by"] = sorted(data["used_by"])
+
+
+# ---------------------------------------------------------------------------
+# Skeleton generation
+# ---------------------------------------------------------------------------
+
+def _parse_one_file(task: Tuple[str, str, str]) -> Optional[Tuple[str, dict]]:
+    """Worker: parse one (full_path, norm_rel, ext) task into a file entry."""
+    full_path, norm_rel, ext = task
+    state = parse_file(full_path, ext)
+    if state is None:
+        return None
+    return norm_rel, {
+        "role": classify_file_role(norm_rel),
+        "doc": state.doc,
+        "imports": state.imports,
+        "exports": state.exports,
+        "types": sorted(state.types),
+        "signatures": state.signatures,
+    }
+
+
+# Below this many files, process spawn + pickle overhead outweighs the
+# parallel parse.
+_PARALLEL_THRESHOLD = 64
+
+
+def _walk_fast(root_path: str, ignore_dirs: Set[str]):
+    """Yield (DirEntry, norm_rel) for every file under root_path.
+
+    scandir keeps the dirent type on the DirEntry, so traversal costs one
+    readdir per directory instead of a stat per entry, and norm_rel comes
+    from slicing entry.path rather than os.path.relpath.
+    """
+    prefix_len = len(root_path.rstrip(os.sep)) + 1
+    pending = deque([root_path])
+    while pending:
+        current = pending.popleft()
+        try:
+            with os.scandir(current) as it:
+                for entry in it:
+                    if entry.is_dir(follow_symlinks=False):
+                        if entry.name not in ignore_dirs:
+                            pending.append(entry.path)
+                    elif entry.is_file(follow_symlinks=False):
+                        yield entry, entry.path[prefix_len:].replace("\\", "/")
+        except OSError:
+            continue
+
+
+def _load_cache() -> dict:
+    try:
+        with open(CACHE_FILE, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_cache(cache: dict) -> None:
+    try:
+        with open(CACHE_FILE, "w", encoding="utf-8") as f:
+            json.dump(cache, f)
+    except OSError:
+        pass
+
+
+def generate_skeleton(root_path: str) -> str:
+    """Scan the repo and render the one-entry-per-file skeleton.
+
+    Parse results are cached per file keyed on (mtime, size); on a
+    typical re-scan almost nothing changed, so only touched files are
+    re-parsed.  Entries for deleted files drop out because the new cache
+    is rebuilt from what the walk actually saw.
+    """
+    file_data: Dict[str, dict] = {}
+    type_index = defaultdict(set)
+
+    cache = _load_cache()
+    cached_files = cache.get("files", {})
+    new_cache_files: Dict[str, dict] = {}
+
+    tasks = []
+    stats: Dict[str, Tuple[int, int]] = {}
+    for entry, norm_rel in _walk_fast(root_path, IGNORE_DIRS):
+        name = entry.name
+        dot = name.rfind(".")
+        ext = name[dot:] if dot >= 0 else ""
+        if ext not in SOURCE_EXTENSIONS:
+            continue
+        try:
+            st = entry.stat()
+        except OSError:
+            continue
+        cached = cached_files.get(norm_rel)
+        if cached and cached["mtime"] == st.st_mtime_ns and cached["size"] == st.st_size:
+            file_data[norm_rel] = dict(cached["data"])
+            new_cache_files[norm_rel] = cached
+            continue
+        tasks.append((entry.path, norm_rel, ext))
+        stats[norm_rel] = (st.st_mtime_ns, st.st_size)
+
+    if len(tasks) >= _PARALLEL_THRESHOLD:
+        with ProcessPoolExecutor() as ex:
+            results = list(ex.map(_parse_one_file, tasks, chunksize=16))
+    else:
+        results = [_parse_one_file(task) for task in tasks]
+    for result in results:
+        if result is None:
+            continue
+        norm_rel, data = result
+        file_data[norm_rel] = data
+        mtime, size = stats[norm_rel]
+        new_cache_files[norm_rel] = {"mtime": mtime, "size": size, "data": data}
+
+    cache["files"] = new_cache_files
+    cache["scanned_at"] = time.time()
+    _save_cache(cache)
+
+    for norm_rel, data in file_data.items():
+        for t in data["types"]:
+            type_index[t].add(norm_rel)
+
+    all_files = set(file_data.keys())
+    build_dependency_graph(file_data, all_files)
+
+    # Short display names are shared between many uses/used-by lines;
+    # compute each one once.
+    short_names: Dict[str, str] = {}
+
+    def _short(p: str) -> str:
+        n = short_names.get(p)
+        if n is None:
+            n = p.rpartition("/")[2].partition(".")[0]
+            short_names[p] = n
+        return n
+
+    # Write straight into a StringIO: no output list to grow and no final
+    # O(total) join copy.
+    buf = StringIO()
+    w = buf.write
+    w("PROJECT SKELETON\n")
+    w("=" * 70 + "\n")
+    for norm_rel in sorted(file_data.keys()):
+        data = file_data[norm_rel]
+        w(norm_rel)
+        w(f" [{data['role']}]")
+        if data["doc"]:
+            w(f" -- {data['doc']}")
+        w("\n")
+        if data["exports"]:
+            w(f"  exports: {', '.join(data['exports'][:10])}\n")
+        if data["types"]:
+            w(f"  types: {', '.join(sorted(data['types']))}\n")
+        shown_sigs = data["signatures"][:8]
+        if shown_sigs:
+            w("  sigs: ")
+            w("; ".join(_SIG_NOISE_RE.sub("", s).strip() for s in shown_sigs))
+            w("\n")
+        if data["imports_resolved"]:
+            w(f"  uses: {', '.join(_short(p) for p in data['imports_resolved'])}\n")
+        if data["used_by"]:
+            w(f"  used by: {', '.join(_short(p) for p in data['used_by'])}\n")
+    w("\nTYPE INDEX\n")
+    w("=" * 70 + "\n")
+    for type_name in sorted(type_index.keys()):
+        files = sorted(type_index[type_name])
+        w(f"  {type_name}: {', '.join(files[:3])}\n")
+    return buf.getvalue().rstrip("\n")
+
+
+# ---------------------------------------------------------------------------
+# Territory (build subcommand)
+# ---------------------------------------------------------------------------
+
+def generate_territory_data(root_path: str, file_list: List[str]) -> str:
+    """Full contents of a chosen set of files, with headers."""
+    chunks = []
+    for rel_path in file_list:
+        # One cleanup pass: strip quotes, forward slashes, and reuse the
+        # result as the display path — no normpath/relpath round trip.
+        rel = rel_path.strip("\"'").replace("\\", "/").strip("/")
+        full = os.path.join(root_path, rel)
+        try:
+            with open(full, "r", encoding="utf-8", errors="replace") as f:
+                content = f.read()
+        except OSError:
+            chunks.append(f"[WARN] Not found: {rel}")
+            continue
+        chunks.append(f"{'=' * 70}\n{rel}\n{'=' * 70}\n{content}")
+    return "\n".join(chunks)
+
+
+def generate_project_structure(root_path: str,
+                               norm_rels: Optional[List[str]] = None) -> str:
+    """Indented directory tree of the source files.
+
+    When the caller already has the scanned file list (e.g. from the scan
+    cache), pass it in to skip re-walking the tree.
+    """
+    lines = ["PROJECT STRUCTURE", "=" * 70]
+    files_by_dir: Dict[str, List[str]] = defaultdict(list)
+    if norm_rels is not None:
+        for norm_rel in norm_rels:
+            d, _, fname = norm_rel.rpartition("/")
+            files_by_dir[d].append(fname)
+    else:
+        for entry, norm_rel in _walk_fast(root_path, IGNORE_DIRS):
+            name = entry.name
+            dot = name.rfind(".")
+            if dot >= 0 and name[dot:] in SOURCE_EXTENSIONS:
+                d, _, fname = norm_rel.rpartition("/")
+                files_by_dir[d].append(fname)
+    emitted: Set[str] = set()
+    for d in sorted(files_by_dir):
+        depth = 0
+        if d:
+            parts = d.split("/")
+            depth = len(parts)
+            for i in range(depth):
+                prefix = "/".join(parts[:i + 1])
+                if prefix not in emitted:
+                    emitted.add(prefix)
+                    lines.append("  " * i + parts[i] + "/")
+        for fname in sorted(files_by_dir[d]):
+            lines.append("  " * depth + fname)
+    return "\n".join(lines)
+
+
+# ---------------------------------------------------------------------------
+# Output
+# ---------------------------------------------------------------------------
+
+def copy_to_clipboard(text: str) -> None:
+    """Copy text to the Windows clipboard; silent no-op elsewhere."""
+    if os.name != "nt":
+        return
+    try:
+        # Invoke clip.exe directly rather than through a shell; it takes
+        # UTF-16LE on stdin, so let subprocess do the encoding.
+        subprocess.run(["clip.exe"], input=text, text=True,
+                       encoding="utf-16-le", check=False)
+    except OSError as e:
+        print(f"[WARN] Clipboard copy failed: {e}")
+
+
+def main():
+    cmd = sys.argv[1] if len(sys.argv) > 1 else "scan"
+    if cmd == "scan":
+        skeleton = generate_skeleton(PROJECT_ROOT)
+        with open(SKELETON_FILE, "w", encoding="utf-8") as f:
+            f.write(skeleton)
+        copy_to_clipboard(skeleton)
+        print(f"[INFO] Skeleton written to {SKELETON_FILE}")
+    elif cmd == "build":
+        args = [a for a in sys.argv[2:] if a != "--no-cache"]
+        use_cache = "--no-cache" not in sys.argv[2:]
+        if not args:
+            print("[WARN] build requires one or more file paths")
+            return
+        territory = generate_territory_data(PROJECT_ROOT, args)
+        # Reuse the file list from a recent scan rather than re-walking the
+        # whole tree for the structure section.
+        norm_rels = None
+        if use_cache:
+            cache = _load_cache()
+            if cache.get("files") and time.time() - cache.get("scanned_at", 0) < 60:
+                norm_rels = sorted(cache["files"].keys())
+        structure = generate_project_structure(PROJECT_ROOT, norm_rels)
+        combined = structure + "\n\n" + territory
+        with open(TERRITORY_FILE, "w", encoding="utf-8") as f:
+            f.write(combined)
+        copy_to_clipboard(combined)
+        print(f"[INFO] Territory written to {TERRITORY_FILE}")
+    else:
+        print(f"[WARN] Unknown command: {cmd} (expected scan or build)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,509 @@
+"""TypeScript analyzer for the Calcula frontend.
+
+Sweeps app/src for .ts/.tsx files and reports the top-level definitions,
+React components, hook bodies (useCallback/useMemo/useEffect) and fnLog
+namespaces it finds, plus names that are referenced in fnLog/invoke calls
+but never defined — a quick consistency check for the logging and bridge
+conventions.
+
+Usage: python ts_analyzer.py [--verbose]
+"""
+
+import bisect
+import mmap
+import os
+import pickle
+import re
+import sys
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from operator import attrgetter
+from dataclasses import dataclass, field
+from typing import Dict, FrozenSet, List, Optional, Tuple
+
+# The scanner patterns are all backtracking-free, so they can run on
+# google-re2's linear-time engine when it is installed.  Opt in with
+# CONTEXT_MANAGER_RE2=1 (same switch as skeleton.py); silently falls back
+# to the stdlib engine otherwise.
+if os.environ.get("CONTEXT_MANAGER_RE2") == "1":
+    try:
+        import re2 as _re
+    except ImportError:
+        _re = re
+else:
+    _re = re
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(SCRIPT_DIR)
+OUTPUT_FILE = os.path.join(SCRIPT_DIR, "ts_analysis.txt")
+CACHE_FILE = os.path.join(SCRIPT_DIR, ".ts_analysis_cache.pkl")
+
+# Below this many files to parse, process-pool startup costs more than the
+# parsing itself.
+_PARALLEL_THRESHOLD = 32
+
+# Files above this size are read via mmap instead of a buffered read.
+_MMAP_THRESHOLD = 64 * 1024
+
+SOURCE_EXTENSIONS = (".ts", ".tsx")
+
+DEFAULT_IGNORE_DIRS = {
+    ".git",
+    "node_modules",
+    "target",
+    "dist",
+    "build",
+    "e2e",
+    "test-stubs",
+    "public",
+    "context_manager",
+}
+
+# Top-level definition shapes.  Each alternative captures its identifier in
+# a (?P<NAME>...) placeholder; _build_master_pattern() fuses them into one
+# alternation so a single match call per line decides which construct (if
+# any) matched, instead of trying each pattern in turn.
+_MASTER_SPECS = [
+    ("fn", r"\s*(?:export\s+)?(?:default\s+)?(?:async\s+)?function\s+(?P<NAME>[A-Za-z_]\w*)"),
+    ("fn", r"\s*(?:export\s+)?const\s+(?P<NAME>[A-Za-z_]\w*)\s*=\s*(?:async\s+)?\([^)]*\)?[^=<]*=>"),
+    ("fn", r"\s*(?:export\s+)?const\s+(?P<NAME>[A-Za-z_]\w*)\s*=\s*(?:async\s+)?function\b"),
+    ("component", r"\s*(?:export\s+)?const\s+(?P<NAME>[A-Za-z_]\w*)\s*:\s*React\.FC"),
+    ("component", r"\s*(?:export\s+)?const\s+(?P<NAME>[A-Za-z_]\w*)\s*=\s*(?:React\.)?memo\s*\("),
+    ("component", r"\s*(?:export\s+)?const\s+(?P<NAME>[A-Za-z_]\w*)\s*=\s*(?:React\.)?forwardRef"),
+    ("interface", r"\s*(?:export\s+)?interface\s+(?P<NAME>[A-Za-z_]\w*)"),
+    ("type", r"\s*(?:export\s+)?type\s+(?P<NAME>[A-Za-z_]\w*)\s*="),
+    ("enum", r"\s*(?:export\s+)?(?:const\s+)?enum\s+(?P<NAME>[A-Za-z_]\w*)"),
+    ("class", r"\s*(?:export\s+)?(?:abstract\s+)?class\s+(?P<NAME>[A-Za-z_]\w*)"),
+    ("const", r"\s*export\s+const\s+(?P<NAME>[A-Z_][A-Z0-9_]*)\s*[:=]"),
+]
+
+
+def _build_master_pattern(specs):
+    """Fuse a spec list into one regex plus a lastgroup -> kind map."""
+    parts = []
+    kind_by_group = {}
+    for i, (kind, pat) in enumerate(specs):
+        group = "n%d" % i
+        parts.append("(?:%s)" % pat.replace("(?P<NAME>", "(?P<%s>" % group))
+        kind_by_group[group] = kind
+    return _re.compile("|".join(parts)), kind_by_group
+
+
+# One scanner for both extensions: React.FC / memo / forwardRef are plain
+# TypeScript and appear in .ts files too.  Only the JSX-based component
+# upgrade below is .tsx-specific.
+_MASTER_RE, _KIND_BY_GROUP = _build_master_pattern(_MASTER_SPECS)
+
+# Every _MASTER_SPECS alternative starts (after indentation) with one of
+# these keywords, so a line that doesn't can skip the regex entirely.
+_KEYWORD_PREFIXES = ("export ", "const ", "function ", "async ",
+                     "interface ", "type ", "class ", "enum ", "abstract ")
+
+# JSX presence detector for is_react_component: component/intrinsic tags
+# or a JSX return, found in a single scan of the body.
+_JSX_RE = _re.compile(r"<[A-Z][a-zA-Z]*|<(?:div|span|button|input)\b|return\s*\(?\s*<")
+
+# Names referenced in logging / bridge / listener calls: any hit that has
+# no matching definition in the same file is suspicious.
+_SUSPICIOUS_RES = tuple(_re.compile(pat) for pat in [
+    r"fnLog\.enter\(\s*[\"'][A-Za-z_]\w*\.([A-Za-z_]\w*)[\"']",
+    r"invoke\(\s*[\"']([a-z_]\w*)[\"']",
+    r"addEventListener\(\s*[\"'][\w-]+[\"'],\s*([A-Za-z_]\w*)\s*\)",
+])
+
+
+@dataclass(slots=True)
+class Definition:
+    name: str
+    kind: str
+    filepath: str
+    start_line: int
+    end_line: int
+    content: str
+    parent: Optional[str] = None
+    # Reserved for cross-file resolution; the shared empty frozenset avoids
+    # allocating a set per definition that this parser never fills.
+    type_refs: FrozenSet[str] = frozenset()
+
+
+@dataclass(slots=True)
+class FileAnalysis:
+    filepath: str
+    definitions: Dict[str, Definition] = field(default_factory=dict)
+    hooks: List[Definition] = field(default_factory=list)
+    log_namespaces: Dict[str, str] = field(default_factory=dict)
+    is_component_file: bool = False
+    # Source text carried over so the missing-pattern pass doesn't re-read
+    # the file; cleared before the analysis is cached.
+    raw_content: Optional[str] = field(default=None, repr=False)
+
+
+# ---------------------------------------------------------------------------
+# Parsing
+# ---------------------------------------------------------------------------
+
+# The next character find_matching_brace needs to look at: braces, string
+# delimiters, or the start of a line comment.  Everything in between is
+# skipped in one C-level search.
+_DELIM_RE = _re.compile(r"[{}\"'`]|//")
+
+
+def find_matching_brace(src: str, start: int) -> int:
+    """Char offset where the brace block opened at/after start closes.
+
+    Jumps from delimiter to delimiter with regex search instead of
+    stepping per character; string literals and line comments are skipped
+    wholesale with str.find.  Falls back to the end of src if the block
+    never closes.
+    """
+    balance = 0
+    found_open = False
+    n = len(src)
+    pos = start
+    search = _DELIM_RE.search
+    src_find = src.find
+    while pos < n:
+        m = search(src, pos)
+        if m is None:
+            break
+        tok = m.group()
+        pos = m.end()
+        if tok == "{":
+            balance += 1
+            found_open = True
+        elif tok == "}":
+            balance -= 1
+            if found_open and balance == 0:
+                return m.start()
+        elif tok == "//":
+            nl = src_find("\n", pos)
+            if nl == -1:
+                break
+            pos = nl + 1
+        else:
+            # String literal: skip to the closing quote, honouring
+            # backslash escapes.  Non-template strings end at the line
+            # break even if unterminated.
+            quote = tok
+            while True:
+                end = src_find(quote, pos)
+                if quote != "`":
+                    # The line break wins whether the quote closes on a
+                    # later line or never closes at all — an apostrophe
+                    # in prose must not swallow the rest of the file.
+                    nl = src_find("\n", pos)
+                    if nl != -1 and (end == -1 or nl < end):
+                        pos = nl + 1
+                        break
+                if end == -1:
+                    pos = n
+                    break
+                j = end
+                while j > pos and src[j - 1] == "\\":
+                    j -= 1
+                pos = end + 1
+                if (end - j) % 2 == 0:
+                    break
+    return n - 1 if n else 0
+
+
+def is_react_component(name: str, content: str) -> bool:
+    """Heuristic: capitalized name whose body produces JSX."""
+    return name[:1].isupper() and _JSX_RE.search(content) is not None
+
+
+# One pass over a function body finds fnLog.enter calls and hook starts
+# together; lastgroup tells the dispatch which family matched.
+_HOOK_MASTER_RE = _re.compile(
+    r"fnLog\.enter\(\s*[\"'](?P<ns>[A-Za-z_]\w*)\.(?P<fn>[A-Za-z_]\w*)[\"']"
+    r"|^(?P<cb_indent>[ \t]+)const\s+(?P<cb_name>[A-Za-z_]\w*)\s*=\s*"
+    r"(?P<hook>useCallback|useMemo)\s*\("
+    r"|^(?P<eff_indent>[ \t]+)useEffect\s*\(",
+    re.MULTILINE)
+
+# End of a hook's dependency array: `], );` shapes like `}, [deps]);`.
+_DEP_END_RE = _re.compile(r"\]\s*\)\s*;")
+
+
+def extract_hook_definitions(definitions: Dict[str, Definition],
+                             filepath: str) -> Tuple[List[Definition], Dict[str, str]]:
+    """Hook bodies and fnLog namespaces inside already-parsed definitions."""
+    hooks: List[Definition] = []
+    log_namespace_map: Dict[str, str] = {}
+    for parent_name, parent_def in definitions.items():
+        pcontent = parent_def.content
+        if "fnLog" not in pcontent and "use" not in pcontent:
+            continue
+        offs = [0]
+        offs.extend(nm.end() for nm in re.finditer("\n", pcontent))
+        offs.append(len(pcontent) + 1)
+        for m in _HOOK_MASTER_RE.finditer(pcontent):
+            group = m.lastgroup
+            if group == "fn":
+                log_namespace_map.setdefault(parent_name, sys.intern(m.group("ns")))
+                continue
+            if group == "hook":
+                name = sys.intern(m.group("cb_name"))
+                kind = sys.intern(m.group("hook"))
+            else:
+                name = sys.intern(f"{parent_name}.effect")
+                kind = "useEffect"
+            em = _DEP_END_RE.search(pcontent, m.end())
+            end_pos = em.end() if em else len(pcontent)
+            start_line = bisect.bisect_right(offs, m.start()) - 1
+            end_line = min(bisect.bisect_right(offs, max(end_pos - 1, 0)) - 1,
+                           len(offs) - 2)
+            hooks.append(Definition(
+                name=name,
+                kind=kind,
+                filepath=filepath,
+                start_line=parent_def.start_line + start_line,
+                end_line=parent_def.start_line + end_line,
+                content=pcontent[offs[start_line]:offs[end_line + 1] - 1],
+                parent=parent_name,
+            ))
+    return hooks, log_namespace_map
+
+
+def analyze_typescript_file(filepath: str) -> FileAnalysis:
+    """Parse one file into a FileAnalysis."""
+    filepath = sys.intern(filepath)
+    analysis = FileAnalysis(filepath=filepath)
+    try:
+        if os.path.getsize(filepath) > _MMAP_THRESHOLD:
+            with open(filepath, "rb") as f, \
+                    mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                content = mm[:].decode("utf-8", "replace")
+        else:
+            with open(filepath, "r", encoding="utf-8", errors="replace") as f:
+                content = f.read()
+    except (OSError, ValueError):
+        return analysis
+    # Line starts into the flat content; sentinel lets every line (and the
+    # bisect back from char offsets) use starts[i]..starts[i+1]-1.
+    line_starts = [0]
+    line_starts.extend(m.end() for m in re.finditer("\n", content))
+    line_starts.append(len(content) + 1)
+    nlines = len(line_starts) - 1
+    is_tsx = filepath.endswith(".tsx")
+    master_re, kind_by_group = _MASTER_RE, _KIND_BY_GROUP
+    i = 0
+    while i < nlines:
+        line = content[line_starts[i]:line_starts[i + 1] - 1]
+        if not line.lstrip().startswith(_KEYWORD_PREFIXES):
+            i += 1
+            continue
+        match = master_re.match(line)
+        if match:
+            group = match.lastgroup
+            kind = kind_by_group[group]
+            # Identifiers repeat heavily across a repo; interning makes the
+            # dict lookups pointer compares and dedupes storage.
+            name = sys.intern(match.group(group))
+            if "{" in line:
+                end_pos = find_matching_brace(content, line_starts[i])
+                end_line = min(bisect.bisect_right(line_starts, end_pos) - 1,
+                               nlines - 1)
+            else:
+                end_line = i
+            def_content = content[line_starts[i]:line_starts[end_line + 1] - 1]
+            if is_tsx and kind == "fn" and is_react_component(name, def_content):
+                kind = "component"
+            analysis.definitions[name] = Definition(
+                name=name,
+                kind=kind,
+                filepath=filepath,
+                start_line=i,
+                end_line=end_line,
+                content=def_content,
+            )
+        i += 1
+    hooks, log_namespace_map = extract_hook_definitions(analysis.definitions, filepath)
+    analysis.hooks = hooks
+    analysis.log_namespaces = log_namespace_map
+    analysis.is_component_file = any(
+        d.kind == "component" for d in analysis.definitions.values())
+    analysis.raw_content = content
+    return analysis
+
+
+# ---------------------------------------------------------------------------
+# Repo sweep
+# ---------------------------------------------------------------------------
+
+def get_all_ts_files(root_path: str) -> List[str]:
+    """Every .ts/.tsx file under root_path, minus ignored dirs and .d.ts."""
+    files = []
+    pending = [root_path]
+    while pending:
+        path = pending.pop()
+        try:
+            entries = os.scandir(path)
+        except OSError:
+            continue
+        with entries:
+            for entry in entries:
+                name = entry.name
+                if entry.is_dir(follow_symlinks=False):
+                    if name not in DEFAULT_IGNORE_DIRS:
+                        pending.append(entry.path)
+                elif name.endswith(SOURCE_EXTENSIONS) and not name.endswith(".d.ts"):
+                    files.append(entry.path)
+    return sorted(files)
+
+
+def load_cache() -> Dict[str, Tuple[Tuple[int, int], FileAnalysis]]:
+    """Previous run's analyses keyed by path, with their (mtime_ns, size)."""
+    try:
+        with open(CACHE_FILE, "rb") as f:
+            return pickle.load(f)
+    except (OSError, pickle.PickleError, EOFError, AttributeError):
+        return {}
+
+
+def save_cache(cache: Dict[str, Tuple[Tuple[int, int], FileAnalysis]]) -> None:
+    try:
+        with open(CACHE_FILE, "wb") as f:
+            pickle.dump(cache, f, protocol=pickle.HIGHEST_PROTOCOL)
+    except OSError:
+        pass
+
+
+def find_missing_patterns(analyses: List[FileAnalysis]) -> List[Tuple[str, str]]:
+    """Names referenced in fnLog/invoke/listener calls but never defined."""
+    missing = []
+    for analysis in analyses:
+        content = analysis.raw_content
+        if content is None:
+            # Analyses revived from the cache carry no source text.
+            try:
+                with open(analysis.filepath, "r", encoding="utf-8",
+                          errors="replace") as f:
+                    content = f.read()
+            except OSError:
+                continue
+        defined_names = {d.name for d in analysis.definitions.values()}
+        for d in analysis.hooks:
+            defined_names.add(d.name)
+        for cre in _SUSPICIOUS_RES:
+            for match in cre.findall(content):
+                if match not in defined_names:
+                    missing.append((analysis.filepath, match))
+    return missing
+
+
+# ---------------------------------------------------------------------------
+# Reporting
+# ---------------------------------------------------------------------------
+
+_ROOT_PREFIX_LEN = len(PROJECT_ROOT)
+
+
+def _rel_path(filepath: str) -> str:
+    """Path relative to PROJECT_ROOT via a prefix strip, not a full scan."""
+    if filepath.startswith(PROJECT_ROOT):
+        return filepath[_ROOT_PREFIX_LEN:].lstrip(os.sep)
+    return filepath
+
+
+def print_file_analysis(analysis: FileAnalysis) -> None:
+    """Detailed per-file report, emitted as one stdout write."""
+    rel_path = _rel_path(analysis.filepath)
+    parts = [f"\n{rel_path}\n", "-" * len(rel_path) + "\n"]
+    by_kind: Dict[str, List[Definition]] = defaultdict(list)
+    for d in analysis.definitions.values():
+        by_kind[d.kind].append(d)
+    for kind in sorted(by_kind):
+        defs = by_kind[kind]
+        defs.sort(key=attrgetter("start_line"))
+        parts.append(f"  {kind} ({len(defs)}):\n")
+        for d in defs:
+            parts.append(f"    {d.name}  [lines {d.start_line + 1}-{d.end_line + 1}]\n")
+    if analysis.hooks:
+        parts.append(f"  hooks ({len(analysis.hooks)}):\n")
+        for h in analysis.hooks:
+            parts.append(f"    {h.kind} {h.name} in {h.parent}\n")
+    if analysis.log_namespaces:
+        for fn_name, ns in sorted(analysis.log_namespaces.items()):
+            parts.append(f"  fnLog: {fn_name} -> {ns}\n")
+    sys.stdout.write("".join(parts))
+
+
+def print_summary(analyses: List[FileAnalysis],
+                  missing: List[Tuple[str, str]]) -> None:
+    """Repo-wide totals."""
+    total_defs = 0
+    total_hooks = 0
+    component_files = 0
+    kind_counts: Dict[str, int] = defaultdict(int)
+    for analysis in analyses:
+        total_defs += len(analysis.definitions)
+        total_hooks += len(analysis.hooks)
+        if analysis.is_component_file:
+            component_files += 1
+        for d in analysis.definitions.values():
+            kind_counts[d.kind] += 1
+    parts = [
+        "\n" + "=" * 70 + "\n",
+        "SUMMARY\n",
+        "=" * 70 + "\n",
+        f"  Files analyzed:  {len(analyses)}\n",
+        f"  Definitions:     {total_defs}\n",
+    ]
+    for kind in sorted(kind_counts):
+        parts.append(f"    {kind}: {kind_counts[kind]}\n")
+    parts.append(f"  Hook bodies:     {total_hooks}\n")
+    parts.append(f"  Component files: {component_files}\n")
+    if missing:
+        parts.append(f"  Missing definitions ({len(missing)}):\n")
+        for filepath, name in missing:
+            parts.append(f"    {name}  (referenced in {_rel_path(filepath)})\n")
+    sys.stdout.write("".join(parts))
+
+
+def main():
+    verbose = "--verbose" in sys.argv
+    files = get_all_ts_files(PROJECT_ROOT)
+    cache = load_cache()
+    new_cache: Dict[str, Tuple[Tuple[int, int], FileAnalysis]] = {}
+    keys: Dict[str, Optional[Tuple[int, int]]] = {}
+    stale = []
+    results: Dict[str, FileAnalysis] = {}
+    for filepath in files:
+        try:
+            st = os.stat(filepath)
+            key = (st.st_mtime_ns, st.st_size)
+        except OSError:
+            key = None
+        keys[filepath] = key
+        cached = cache.get(filepath)
+        if key is not None and cached is not None and cached[0] == key:
+            results[filepath] = cached[1]
+        else:
+            stale.append(filepath)
+    if len(stale) >= _PARALLEL_THRESHOLD:
+        with ProcessPoolExecutor() as ex:
+            for analysis in ex.map(analyze_typescript_file, stale, chunksize=8):
+                results[analysis.filepath] = analysis
+    else:
+        for filepath in stale:
+            results[filepath] = analyze_typescript_file(filepath)
+    analyses = []
+    for filepath in files:
+        analysis = results[filepath]
+        if keys[filepath] is not None:
+            new_cache[filepath] = (keys[filepath], analysis)
+        analyses.append(analysis)
+    missing = find_missing_patterns(analyses)
+    for analysis in analyses:
+        analysis.raw_content = None
+    save_cache(new_cache)
+    if verbose:
+        for analysis in analyses:
+            if analysis.definitions or analysis.hooks:
+                print_file_analysis(analysis)
+    print_summary(analyses, missing)
+
+
+if __name__ == "__main__":
+    main()